@@ -1,22 +1,68 @@
+import struct
 import threading
-import wave
-from typing import Optional
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from utils.logging import get_logger, exception
+
+
+def _pcm16_stereo_header(sample_rate: int, data_size: int) -> bytes:
+    """Canonical 44-byte WAV header for interleaved 16-bit stereo PCM."""
+    num_channels = 2
+    bits_per_sample = 16
+    block_align = num_channels * bits_per_sample // 8
+    byte_rate = sample_rate * block_align
+    return b"".join(
+        (
+            b"RIFF",
+            struct.pack("<I", 36 + data_size),
+            b"WAVE",
+            b"fmt ",
+            struct.pack("<IHHIIHH", 16, 0x0001, num_channels, sample_rate, byte_rate, block_align, bits_per_sample),
+            b"data",
+            struct.pack("<I", data_size),
+        )
+    )
 
 
 class ConversationRecorder:
     """Write synchronized stereo WAV with caller and assistant channels."""
 
-    def __init__(self, path: str, sample_rate: int) -> None:
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int,
+        on_frames: Optional[Callable[[bytes], None]] = None,
+    ) -> None:
         self.path = path
         self.sample_rate = sample_rate
-        self._wave = wave.open(path, "wb")
-        self._wave.setnchannels(2)
-        self._wave.setsampwidth(2)  # PCM16
-        self._wave.setframerate(sample_rate)
+        self._on_frames = on_frames  # Receives each interleaved block after it is written
+        # Raw writes with the RIFF/data sizes patched once at close(); the wave
+        # module would seek back and rewrite the header on every writeframes.
+        self._f = open(path, "wb", buffering=0)
+        self._write_all(_pcm16_stereo_header(sample_rate, 0))
+        self._bytes_written = 0
         self._lock = threading.Lock()
-        self._buffers = [bytearray(), bytearray()]
+        # Per-channel pending bytes plus read cursor; consumed bytes are
+        # compacted lazily instead of memmoving the tail on every flush.
+        self._data = [bytearray(), bytearray()]
+        self._head = [0, 0]
         self._closed = False
-        self._flush_block = 4096  # bytes per channel
+        self._flush_block = 32768  # bytes per channel
+        # Interleaved output for one block is reused across flushes
+        self._scratch = np.empty(self._flush_block, dtype="<i2")
+        self._compact_threshold = 1 << 20
+        # Producers only append here; a single writer thread pairs, pads,
+        # interleaves and writes so disk I/O stays off the audio threads.
+        self._incoming: deque[tuple[int, bytes]] = deque()
+        # Orders producer appends against close(); held only around the append, never for I/O
+        self._accept_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._log = get_logger("audio.recorder")
+        self._writer = threading.Thread(target=self._drain, name="conversation-recorder", daemon=True)
+        self._writer.start()
 
     def write_caller(self, pcm16_bytes: bytes) -> None:
         self._write_channel(0, pcm16_bytes)
@@ -27,19 +73,62 @@ class ConversationRecorder:
     def _write_channel(self, index: int, data: bytes) -> None:
         if not data:
             return
-        with self._lock:
+        data = bytes(data)
+        with self._accept_lock:
+            # Anything accepted here is queued before close() can mark the recorder closed
             if self._closed:
                 return
-            buf = self._buffers[index]
-            buf.extend(data)
-            other = self._buffers[1 - index]
-            diff = len(buf) - len(other)
-            if diff > 0:
-                other.extend(b"\x00" * diff)
-            self._flush_locked()
+            self._incoming.append((index, data))
+        self._wakeup.set()
+
+    def _drain(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                while self._incoming:
+                    index, data = self._incoming.popleft()
+                    self._append_locked(index, data)
+                # One flush per drained batch keeps writes large and infrequent
+                try:
+                    self._flush_locked()
+                except Exception:
+                    exception(self._log, "Failed to write stereo frames", path=str(self.path))
+            if self._closed and not self._incoming:
+                return
+
+    def _append_locked(self, index: int, data: bytes) -> None:
+        self._data[index].extend(data)
+        diff = self._pending(index) - self._pending(1 - index)
+        if diff > 0:
+            self._data[1 - index].extend(b"\x00" * diff)
+
+    def _pending(self, index: int) -> int:
+        return len(self._data[index]) - self._head[index]
+
+    def _compact_locked(self, index: int) -> None:
+        head = self._head[index]
+        data = self._data[index]
+        if head >= len(data):
+            data.clear()
+            self._head[index] = 0
+        elif head > self._compact_threshold:
+            del data[:head]
+            self._head[index] = 0
+
+    def _write_all(self, data) -> int:
+        # Unbuffered (raw) writes may be short; keep going until everything is out
+        view = memoryview(data).cast("B")
+        written = 0
+        while written < len(view):
+            n = self._f.write(view[written:])
+            if not n:
+                break
+            written += n
+        return written
 
     def _flush_locked(self) -> None:
-        ready = min(len(self._buffers[0]), len(self._buffers[1]))
+        ready = min(self._pending(0), self._pending(1))
         if ready < 2:
             return
         ready -= ready % 2  # ensure whole samples
@@ -48,38 +137,61 @@ class ConversationRecorder:
             take -= take % 2
             if take <= 0:
                 break
-            left = bytes(self._buffers[0][:take])
-            right = bytes(self._buffers[1][:take])
-            interleaved = self._interleave(left, right)
-            self._wave.writeframes(interleaved)
-            del self._buffers[0][:take]
-            del self._buffers[1][:take]
+            h0, h1 = self._head
+            interleaved = self._interleave(self._data[0][h0:h0 + take], self._data[1][h1:h1 + take], self._scratch)
+            self._bytes_written += self._write_all(interleaved)
+            if self._on_frames:
+                try:
+                    self._on_frames(interleaved.tobytes())
+                except Exception:
+                    exception(self._log, "Stereo frame listener failed")
+            self._head[0] += take
+            self._head[1] += take
             ready -= take
+        self._compact_locked(0)
+        self._compact_locked(1)
 
     def close(self) -> None:
-        with self._lock:
+        with self._accept_lock:
             if self._closed:
                 return
+            self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        with self._lock:
+            # The writer drains before exiting; this only catches a writer that died early
+            while self._incoming:
+                index, data = self._incoming.popleft()
+                self._append_locked(index, data)
             # Pad any remaining shorter channel with silence
-            diff = len(self._buffers[0]) - len(self._buffers[1])
+            diff = self._pending(0) - self._pending(1)
             if diff > 0:
-                self._buffers[1].extend(b"\x00" * diff)
+                self._data[1].extend(b"\x00" * diff)
             elif diff < 0:
-                self._buffers[0].extend(b"\x00" * (-diff))
+                self._data[0].extend(b"\x00" * (-diff))
             # Flush remaining data
             self._flush_locked()
-            self._wave.close()
-            self._closed = True
+            try:
+                self._f.seek(4)
+                self._write_all(struct.pack("<I", 36 + self._bytes_written))
+                self._f.seek(40)
+                self._write_all(struct.pack("<I", self._bytes_written))
+            finally:
+                self._f.close()
 
     @staticmethod
-    def _interleave(left: bytes, right: bytes) -> bytes:
+    def _interleave(left: bytes, right: bytes, out: Optional[np.ndarray] = None) -> memoryview:
         # Both inputs must have equal length and be multiples of 2 bytes.
-        frames = bytearray(len(left) * 2)
-        frames[0::4] = left[0::2]
-        frames[1::4] = left[1::2]
-        frames[2::4] = right[0::2]
-        frames[3::4] = right[1::2]
-        return bytes(frames)
+        # The result is a view into ``out``; it is only valid until the next call.
+        l = np.frombuffer(left, dtype="<i2")
+        r = np.frombuffer(right, dtype="<i2")
+        size = l.size * 2
+        if out is None or out.size < size:
+            out = np.empty(size, dtype="<i2")
+        frames = out[:size]
+        frames[0::2] = l
+        frames[1::2] = r
+        return memoryview(frames).cast("B")
 
     def __enter__(self):  # pragma: no cover - convenience
         return self
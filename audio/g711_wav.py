@@ -1,5 +1,9 @@
+import os
 import struct
 
+# RIFF/WAVE header with a 16-byte fmt chunk and the data chunk header: 44 bytes
+_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
 
 def write_mulaw_wav(path: str, ulaw_bytes: bytes, sample_rate: int = 8000):
     """Write µ-law bytes into a WAV container (PCM mu-law, fmt=7)."""
@@ -10,23 +14,17 @@ def write_mulaw_wav(path: str, ulaw_bytes: bytes, sample_rate: int = 8000):
     data_size = len(ulaw_bytes)
     riff_size = 36 + data_size
 
-    with open(path, "wb") as f:
-        # RIFF header
-        f.write(b"RIFF")
-        f.write(struct.pack('<I', riff_size))
-        f.write(b"WAVE")
-        
-        # fmt chunk
-        f.write(b"fmt ")
-        f.write(struct.pack('<I', 16))              # PCM fmt chunk size
-        f.write(struct.pack('<H', 0x0007))          # WAVE_FORMAT_MULAW
-        f.write(struct.pack('<H', num_channels))
-        f.write(struct.pack('<I', sample_rate))
-        f.write(struct.pack('<I', byte_rate))
-        f.write(struct.pack('<H', block_align))
-        f.write(struct.pack('<H', bits_per_sample))
+    header = _HEADER.pack(
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16,                                # PCM fmt chunk size
+        0x0007,                                     # WAVE_FORMAT_MULAW
+        num_channels, sample_rate, byte_rate, block_align, bits_per_sample,
+        b"data", data_size,
+    )
 
-        # data chunk
-        f.write(b"data")
-        f.write(struct.pack('<I', data_size))
-        f.write(ulaw_bytes)
\ No newline at end of file
+    # Header and payload go out in one writev, without a buffered file object
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.writev(fd, (header, ulaw_bytes))
+    finally:
+        os.close(fd)
@@ -3,6 +3,14 @@ import struct
 import time
 from typing import Iterator, Optional
 
+try:
+    from inotify_simple import INotify, flags  # type: ignore
+    _HAS_INOTIFY = True
+except Exception:
+    _HAS_INOTIFY = False
+
+_INOTIFY_TIMEOUT_MS = 100
+
 
 class TailWavReader:
     """Tail a growing WAV file and yield raw PCM16 mono chunks.
@@ -33,6 +41,14 @@ class TailWavReader:
         # Position after header
         self._offset = 44
         self._f.seek(self._offset)
+        # Wake on writes instead of sleeping a fixed interval (Linux only)
+        self._inotify = None
+        if _HAS_INOTIFY:
+            try:
+                self._inotify = INotify()
+                self._inotify.add_watch(path, flags.MODIFY)
+            except OSError:
+                self._close_inotify()
 
     def iter_chunks(self, stop_event, frame_bytes: Optional[int] = None, poll_interval: float = 0.01) -> Iterator[bytes]:
         if frame_bytes is None:
@@ -40,21 +56,41 @@ class TailWavReader:
             frame_bytes = int(self.sample_rate * self.channels * self.bytes_per_sample * 0.02)
             frame_bytes = max(1, frame_bytes)
         while not stop_event.is_set():
-            # Check current file size
+            # Check current file size via the open fd (no path lookup; survives unlink)
+            size = os.fstat(self._f.fileno()).st_size
+            # Read every whole frame available in one positional read, then slice
+            available = size - self._offset
+            if available >= frame_bytes:
+                data = os.pread(self._f.fileno(), available - available % frame_bytes, self._offset)
+                whole = len(data) - len(data) % frame_bytes
+                self._offset += whole
+                for start in range(0, whole, frame_bytes):
+                    yield data[start:start + frame_bytes]      # Quick yield to caller
+                if whole:
+                    continue
+            self._wait_for_data(poll_interval)
+
+    def _wait_for_data(self, timeout: float) -> None:
+        if self._inotify is not None:
             try:
-                size = os.path.getsize(self.path)
-            except FileNotFoundError:
-                break
-            # Read while we have at least one frame
-            while size - self._offset >= frame_bytes:
-                data = self._f.read(frame_bytes)
-                if not data:
-                    break
-                self._offset += len(data)
-                yield data      # Quick yield to caller
-            time.sleep(poll_interval)
+                # Writes wake the read immediately and events queue between calls, so the
+                # timeout only bounds how often stop_event is checked
+                self._inotify.read(timeout=max(_INOTIFY_TIMEOUT_MS, int(timeout * 1000)))
+                return
+            except OSError:
+                self._close_inotify()
+        time.sleep(timeout)
+
+    def _close_inotify(self):
+        try:
+            if self._inotify is not None:
+                self._inotify.close()
+        except Exception:
+            pass
+        self._inotify = None
 
     def close(self):
+        self._close_inotify()
         try:
             self._f.close()
         except Exception:
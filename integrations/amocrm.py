@@ -1,20 +1,35 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Optional
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Iterable, Optional
 
 import httpx
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from utils.logging import get_logger, exception
 
+_NON_DIGIT = re.compile(r"\D")
+_SCHEME_RE = re.compile(r"^https?://", re.IGNORECASE)
+
 
 class AmoCRMError(RuntimeError):
     """Raised when the AmoCRM API returns an error."""
 
 
-def _normalize_phone_candidates(phone: str) -> list[str]:
-    digits = re.sub(r"\D", "", phone or "")
+class AmoCRMClientError(AmoCRMError):
+    """Raised for 4xx responses that will not succeed on retry."""
+
+
+class AmoCRMServerError(AmoCRMError):
+    """Raised for 5xx, 408 and 429 responses that are worth retrying."""
+
+
+@lru_cache(maxsize=1024)
+def _normalize_phone_candidates(phone: str) -> tuple[str, ...]:
+    digits = _NON_DIGIT.sub("", phone or "")
     candidates: list[str] = []
     if digits:
         candidates.append(digits)
@@ -26,7 +41,27 @@ def _normalize_phone_candidates(phone: str) -> list[str]:
             candidates.append(digits[1:])
         elif digits.startswith("9") and len(digits) == 10:
             candidates.append("+7" + digits)
-    return list(dict.fromkeys(candidates))  # dedupe preserving order
+    return tuple(dict.fromkeys(candidates))  # dedupe preserving order
+
+
+def _contact_phone_digits(contact: dict) -> list[str]:
+    digits: list[str] = []
+    for field in contact.get("custom_fields_values") or []:
+        if field.get("field_code") != "PHONE":
+            continue
+        for value in field.get("values") or []:
+            digits.append(_NON_DIGIT.sub("", str(value.get("value") or "")))
+    return digits
+
+
+def _best_contact_match(contacts: list[dict], national: str) -> Optional[dict]:
+    """Return the contact whose stored phone ends with the national number, if any."""
+
+    if national:
+        for contact in contacts:
+            if any(d.endswith(national) for d in _contact_phone_digits(contact)):
+                return contact
+    return None
 
 
 class AmoCRMClient:
@@ -38,6 +73,8 @@ class AmoCRMClient:
         access_token: str,
         *,
         timeout: float = 30.0,
+        contact_cache_ttl: float = 60.0,
+        contact_cache_size: int = 512,
     ) -> None:
         if not base_url:
             raise ValueError("AMOCRM_BASE_URL must be set")
@@ -45,7 +82,7 @@ class AmoCRMClient:
             raise ValueError("AMOCRM_ACCESS_TOKEN must be set")
 
         base_url = base_url.strip()
-        if not re.match(r"^https?://", base_url, re.IGNORECASE):
+        if not _SCHEME_RE.match(base_url):
             base_url = f"https://{base_url}"
 
         parsed = httpx.URL(base_url)
@@ -60,6 +97,7 @@ class AmoCRMClient:
         self._client = httpx.Client(
             base_url=base_url,
             timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=300),
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "Content-Type": "application/json",
@@ -67,6 +105,12 @@ class AmoCRMClient:
             },
         )
         self._log = get_logger("integrations.amocrm")
+        # Short-lived cache of phone search results: digits-only phone -> matched contact id.
+        # Only the id is kept; the contact and its leads are always fetched fresh.
+        self._contact_cache: dict[str, tuple[float, int]] = {}
+        self._contact_cache_lock = threading.Lock()
+        self._contact_cache_ttl = contact_cache_ttl
+        self._contact_cache_size = contact_cache_size
 
     def close(self) -> None:
         try:
@@ -81,13 +125,15 @@ class AmoCRMClient:
             exception(self._log, "AmoCRM request failed", method=method, url=url)
             raise
 
-        if response.status_code >= 400:
+        status = response.status_code
+        if status >= 400:
             text = response.text
-            raise AmoCRMError(f"AmoCRM error {response.status_code}: {text}")
+            error_cls = AmoCRMServerError if status >= 500 or status in (408, 429) else AmoCRMClientError
+            raise error_cls(f"AmoCRM error {status}: {text}")
         return response
 
     @retry(
-        retry=retry_if_exception_type((AmoCRMError, httpx.HTTPError)),
+        retry=retry_if_exception_type((AmoCRMServerError, httpx.TransportError)),
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=8),
         reraise=True,
@@ -96,21 +142,77 @@ class AmoCRMClient:
         """Return the first contact matching the phone number (with leads embedded)."""
 
         candidates = _normalize_phone_candidates(phone)
-        params = {"limit": 1, "with": "leads"}
-
-        for query in candidates:
+        cache_key = candidates[0] if candidates else ""
+        cached_id = self._cached_contact_id(cache_key)
+        if cached_id is not None:
+            # One lookup by id instead of a phone search, with the current leads embedded
+            try:
+                response = self._request("GET", f"/api/v4/contacts/{cached_id}", params={"with": "leads"})
+            except AmoCRMClientError:
+                # Deleted or merged since it was cached; search again
+                self._forget_contact(cache_key)
+            else:
+                self._log.debug("Contact cache hit", phone=phone, contact_id=str(cached_id))
+                return response.json()
+
+        # The national number is a substring of every stored format, so one
+        # query usually suffices; other variants are only a fallback.
+        national = candidates[0][-10:] if candidates and len(candidates[0]) >= 10 else ""
+        queries = [national] if national else []
+        queries.extend(c for c in candidates if c != national)
+        params = {"limit": 5, "with": "leads"}
+
+        for query in queries:
             params["query"] = query
             response = self._request("GET", "/api/v4/contacts", params=params)
             data = response.json()
             contacts = data.get("_embedded", {}).get("contacts") or []
-            if contacts:
-                contact = contacts[0]
-                self._log.info("Found contact", phone=phone, contact_id=str(contact.get("id")))
-                return contact
+            if not contacts:
+                continue
+            contact = _best_contact_match(contacts, national)
+            if contact is None:
+                if query != candidates[0]:
+                    # A bare national number also matches as a substring of unrelated phones
+                    continue
+                contact = contacts[0]   # Exact-digits search: same fallback as before
+            self._log.info("Found contact", phone=phone, contact_id=str(contact.get("id")))
+            self._store_contact_id(cache_key, contact.get("id"))
+            return contact
 
         self._log.warning("Contact not found", phone=phone)
         return None
 
+    def _cached_contact_id(self, key: str) -> Optional[int]:
+        if not key or self._contact_cache_ttl <= 0:
+            return None
+        with self._contact_cache_lock:
+            entry = self._contact_cache.get(key)
+            if entry is None:
+                return None
+            expires_at, contact_id = entry
+            if expires_at <= time.monotonic():
+                del self._contact_cache[key]
+                return None
+            return contact_id
+
+    def _store_contact_id(self, key: str, contact_id: Any) -> None:
+        if not key or self._contact_cache_ttl <= 0:
+            return
+        try:
+            contact_id = int(contact_id)
+        except (TypeError, ValueError):
+            return
+        with self._contact_cache_lock:
+            self._contact_cache.pop(key, None)
+            self._contact_cache[key] = (time.monotonic() + self._contact_cache_ttl, contact_id)
+            while len(self._contact_cache) > self._contact_cache_size:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                del self._contact_cache[next(iter(self._contact_cache))]
+
+    def _forget_contact(self, key: str) -> None:
+        with self._contact_cache_lock:
+            self._contact_cache.pop(key, None)
+
     def pick_lead_id(self, contact: dict) -> Optional[int]:
         """Select the most relevant lead id from a contact payload."""
 
@@ -128,7 +230,7 @@ class AmoCRMClient:
             return None
 
     @retry(
-        retry=retry_if_exception_type((AmoCRMError, httpx.HTTPError)),
+        retry=retry_if_exception_type((AmoCRMServerError, httpx.TransportError)),
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=8),
         reraise=True,
@@ -1,19 +1,37 @@
 from __future__ import annotations
 
-import json
+import os
+import re
+import threading
+import time
 from pathlib import Path
 from typing import Iterable, Optional
+from urllib.parse import urlencode
 
 import httpx
+import websocket
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from utils import jsonfast
 from utils.logging import get_logger, exception
 
+_UPLOAD_CHUNK_BYTES = 64 * 1024
+# Drops the space Deepgram leaves before punctuation and English contractions
+_PUNCT_RE = re.compile(r" ([,.!?:;])| (n't)")
+
 
 class DeepgramError(RuntimeError):
     """Raised when the Deepgram API returns an error response."""
 
 
+class DeepgramClientError(DeepgramError):
+    """Raised for 4xx responses that will not succeed on retry."""
+
+
+class DeepgramServerError(DeepgramError):
+    """Raised for 5xx, 408, 429 or malformed responses that are worth retrying."""
+
+
 class DeepgramClient:
     """HTTP client wrapper for Deepgram's transcription API."""
 
@@ -23,7 +41,9 @@ class DeepgramClient:
         *,
         model: str = "nova-2",
         endpoint: str = "https://api.deepgram.com/v1/listen",
+        live_endpoint: str = "wss://api.deepgram.com/v1/listen",
         timeout: float = 120.0,
+        streaming: bool = False,
     ) -> None:
         if not api_key:
             raise ValueError("Deepgram API key is required")
@@ -31,8 +51,28 @@ class DeepgramClient:
         self._api_key = api_key
         self._model = model
         self._endpoint = endpoint
-        self._client = httpx.Client(timeout=httpx.Timeout(timeout))
+        self._live_endpoint = live_endpoint
+        self._streaming = streaming
+        self._client = httpx.Client(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=300),
+        )
         self._log = get_logger("integrations.deepgram")
+        # Request metadata never changes for a client, so build it once
+        self._headers = {
+            "Authorization": f"Token {api_key}",
+            "Content-Type": "audio/wav",
+        }
+        self._params = {
+            "model": model,
+            "utterances": "true",
+            "punctuate": "true",
+            "language": "ru",
+            "smart_format": "true",
+            "profanity_filter": "false",
+            "multichannel": "true",
+            "diarize": "true",
+        }
 
     def close(self) -> None:
         try:
@@ -40,8 +80,50 @@ class DeepgramClient:
         except Exception:
             pass
 
+    def open_stream(
+        self,
+        sample_rate: int,
+        *,
+        channels: int = 2,
+        context: Optional[dict[str, str]] = None,
+    ) -> Optional["DeepgramLiveStream"]:
+        """Open a live transcription stream for interleaved PCM16 audio.
+
+        Returns None when streaming is disabled or the stream cannot be started;
+        callers then rely on the batch ``transcribe`` path. The handshake runs in
+        the background, so this never waits on Deepgram.
+        """
+
+        if not self._streaming:
+            return None
+        params = {
+            "model": self._model,
+            "language": "ru",
+            "punctuate": "true",
+            "smart_format": "true",
+            "profanity_filter": "false",
+            "multichannel": "true",
+            "diarize": "true",
+            "encoding": "linear16",
+            "sample_rate": str(sample_rate),
+            "channels": str(channels),
+        }
+        stream = DeepgramLiveStream(
+            f"{self._live_endpoint}?{urlencode(params)}",
+            self._api_key,
+            channels=channels,
+            context=context,
+        )
+        try:
+            stream.start()
+        except Exception:
+            exception(self._log, "Failed to open Deepgram live stream")
+            stream.close()
+            return None
+        return stream
+
     @retry(
-        retry=retry_if_exception_type((DeepgramError, httpx.HTTPError)),
+        retry=retry_if_exception_type((DeepgramServerError, httpx.TransportError)),
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=8),
         reraise=True,
@@ -53,33 +135,24 @@ class DeepgramClient:
         """
 
         path = Path(wav_path)
-        if not path.is_file():
-            raise FileNotFoundError(f"Recording not found: {wav_path}")
-
-        headers = {
-            "Authorization": f"Token {self._api_key}",
-            "Content-Type": "audio/wav",
-        }
-        params = {
-            "model": self._model,
-            "utterances": "true",
-            "punctuate": "true",
-            "language": "ru",
-            "smart_format": "true",
-            "profanity_filter": "false",
-            "multichannel": "true",
-            "diarize": "true",
-        }
+        try:
+            audio_file = path.open("rb")
+        except (FileNotFoundError, IsADirectoryError) as exc:
+            raise FileNotFoundError(f"Recording not found: {wav_path}") from exc
 
-        self._log.info("Sending audio to Deepgram", path=str(path), size=str(path.stat().st_size))
+        # One open + fstat per attempt; every tenacity retry reopens from the path
+        with audio_file:
+            size = os.fstat(audio_file.fileno()).st_size
+            headers = {**self._headers, "Content-Length": str(size)}
+            self._log.info("Sending audio to Deepgram", path=str(path), size=str(size))
 
-        with path.open("rb") as audio_file:
             try:
                 response = self._client.post(
                     self._endpoint,
                     headers=headers,
-                    params=params,
-                    data=audio_file,
+                    params=self._params,
+                    # Stream from disk in fixed chunks instead of buffering the file
+                    content=iter(lambda: audio_file.read(_UPLOAD_CHUNK_BYTES), b""),
                 )
             except httpx.HTTPError as exc:
                 exception(self._log, "Deepgram request failed", path=str(path))
@@ -88,15 +161,17 @@ class DeepgramClient:
         if response.status_code >= 400:
             detail: Optional[str]
             try:
-                detail = response.json().get("error")
+                detail = jsonfast.loads(response.content).get("error")
             except Exception:
                 detail = response.text
-            raise DeepgramError(f"Deepgram error {response.status_code}: {detail}")
+            status = response.status_code
+            error_cls = DeepgramServerError if status >= 500 or status in (408, 429) else DeepgramClientError
+            raise error_cls(f"Deepgram error {status}: {detail}")
 
         try:
-            payload = response.json()
-        except json.JSONDecodeError as exc:
-            raise DeepgramError("Failed to decode Deepgram response") from exc
+            payload = jsonfast.loads(response.content)
+        except jsonfast.JSONDecodeError as exc:
+            raise DeepgramServerError("Failed to decode Deepgram response") from exc
 
         return payload
 
@@ -158,19 +233,22 @@ class DeepgramClient:
             )
         return normalized
 
+    @staticmethod
+    def speaker_label(entry: dict) -> str:
+        speaker = entry.get("speaker")
+        if speaker is None:
+            return "Caller"
+        if isinstance(speaker, str):
+            return speaker
+        return f"Speaker {speaker}"
+
     @staticmethod
     def flatten_utterances(utterances: Iterable[dict]) -> str:
         """Produce a readable text transcript from utterance list."""
 
         lines: list[str] = []
         for entry in utterances:
-            speaker = entry.get("speaker")
-            if speaker is None:
-                label = "Caller"
-            elif isinstance(speaker, str):
-                label = speaker
-            else:
-                label = f"Speaker {speaker}"
+            label = DeepgramClient.speaker_label(entry)
             start = entry.get("start")
             ts = f"{start:.1f}s" if isinstance(start, (int, float)) else "?"
             text = entry.get("text", "")
@@ -187,17 +265,22 @@ class DeepgramClient:
         start_time = None
         last_end = None
         GAP_THRESHOLD = 1.0
+        # Bind hot lookups locally; this loop runs once per recognized word
+        segments_append = segments.append
+        buffer_append = buffer.append
+        join_words = DeepgramClient._join_words
 
         for item in words:
-            word = (item.get("word") or "").strip()
+            get = item.get
+            word = (get("word") or "").strip()
             if not word:
                 continue
-            w_start = item.get("start")
-            w_end = item.get("end", w_start)
+            w_start = get("start")
+            w_end = get("end", w_start)
             if buffer and last_end is not None and w_start is not None and w_start - last_end > GAP_THRESHOLD:
-                segments.append(
+                segments_append(
                     {
-                        "text": DeepgramClient._join_words(buffer),
+                        "text": join_words(buffer),
                         "speaker": role,
                         "channel": channel_index,
                         "start": start_time,
@@ -205,20 +288,20 @@ class DeepgramClient:
                         "confidence": confidence,
                     }
                 )
-                buffer = []
+                buffer.clear()
                 start_time = None
                 last_end = None
 
             if not buffer:
                 start_time = w_start
 
-            buffer.append(word)
+            buffer_append(word)
             last_end = w_end if isinstance(w_end, (int, float)) else last_end
 
         if buffer:
-            segments.append(
+            segments_append(
                 {
-                    "text": DeepgramClient._join_words(buffer),
+                    "text": join_words(buffer),
                     "speaker": role,
                     "channel": channel_index,
                     "start": start_time,
@@ -231,17 +314,189 @@ class DeepgramClient:
 
     @staticmethod
     def _join_words(words: list[str]) -> str:
-        raw = " ".join(words)
-        replacements = {
-            " ,": ",",
-            " .": ".",
-            " !": "!",
-            " ?": "?",
-            " :": ":",
-            " ;": ";",
-        }
-        for needle, repl in replacements.items():
-            raw = raw.replace(needle, repl)
-        raw = raw.replace(" n't", "n't")
-        return raw.strip()
+        return _PUNCT_RE.sub(lambda m: m.group(1) or m.group(2), " ".join(words)).strip()
 
+
+class DeepgramLiveStream:
+    """Live multichannel transcription over Deepgram's streaming WebSocket.
+
+    Collects finalized results while the call runs so the post-call pipeline
+    can skip the batch upload. ``finish`` returns a payload shaped like the
+    batch response, so ``extract_utterances`` handles both. Audio sent before
+    the handshake completes is buffered and flushed on open.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        *,
+        channels: int = 2,
+        context: Optional[dict[str, str]] = None,
+    ) -> None:
+        self._url = url
+        self._headers = [f"Authorization: Token {api_key}"]
+        self._channels = channels
+        self._ws: Optional[websocket.WebSocketApp] = None
+        self._ws_thread: Optional[threading.Thread] = None
+        self._open_evt = threading.Event()
+        self._closed_evt = threading.Event()
+        self._send_lock = threading.Lock()
+        self._results_lock = threading.Lock()
+        self._words: list[list[dict]] = [[] for _ in range(channels)]
+        self._transcripts: list[list[str]] = [[] for _ in range(channels)]
+        self._confidences: list[list[float]] = [[] for _ in range(channels)]
+        self._pending: list[bytes] = []     # Audio sent before the socket opened; guarded by _send_lock
+        self._connect_deadline = 0.0
+        self._failed = False
+        self._finishing = False
+        self.log = get_logger("integrations.deepgram.live", **(context or {}))
+
+    def start(self, connect_timeout: float = 10.0) -> None:
+        """Begin connecting in the background; gives up if not open within ``connect_timeout``."""
+
+        def on_open(ws):
+            with self._send_lock:
+                pending, self._pending = self._pending, []
+                try:
+                    for chunk in pending:
+                        ws.send(chunk, opcode=websocket.ABNF.OPCODE_BINARY)
+                except Exception as exc:
+                    self._failed = True
+                    self.log.warning("Deepgram live send failed", error=str(exc))
+                self._open_evt.set()
+            self.log.info("Deepgram live stream connected", buffered=str(len(pending)))
+
+        def on_message(ws, message):
+            try:
+                data = jsonfast.loads(message)
+            except Exception:
+                return
+            if data.get("type") == "Results" and data.get("is_final"):
+                self._collect(data)
+
+        def on_error(ws, err):
+            if not self._finishing:
+                self._failed = True
+                self.log.warning("Deepgram live stream error", error=str(err))
+                with self._send_lock:
+                    self._pending.clear()
+
+        def on_close(ws, status, msg):
+            self._closed_evt.set()
+
+        self._ws = websocket.WebSocketApp(
+            self._url,
+            header=self._headers,
+            on_open=on_open,
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close,
+        )
+        self._connect_deadline = time.monotonic() + connect_timeout
+        t = threading.Thread(target=self._ws.run_forever, kwargs=dict(skip_utf8_validation=True), daemon=True)
+        t.start()
+        self._ws_thread = t
+
+    def _connect_failed_locked(self) -> bool:
+        """Give up on a handshake that has outlived its deadline; caller holds _send_lock."""
+        if self._open_evt.is_set() or time.monotonic() <= self._connect_deadline:
+            return False
+        if not self._failed:
+            self._failed = True
+            self._pending.clear()
+            self.log.warning("Deepgram live stream did not connect in time")
+        return True
+
+    def _collect(self, data: dict) -> None:
+        index = (data.get("channel_index") or [0])[0]
+        if not isinstance(index, int) or not 0 <= index < self._channels:
+            return
+        alt = ((data.get("channel") or {}).get("alternatives") or [{}])[0]
+        transcript = (alt.get("transcript") or "").strip()
+        with self._results_lock:
+            self._words[index].extend(alt.get("words") or [])
+            if transcript:
+                self._transcripts[index].append(transcript)
+                confidence = alt.get("confidence")
+                if isinstance(confidence, (int, float)):
+                    self._confidences[index].append(float(confidence))
+
+    def send(self, pcm16_interleaved: bytes) -> None:
+        if self._failed or self._finishing or not self._ws or not pcm16_interleaved:
+            return
+        try:
+            with self._send_lock:
+                if not self._open_evt.is_set():
+                    if not self._connect_failed_locked():
+                        self._pending.append(bytes(pcm16_interleaved))
+                    return
+                self._ws.send(pcm16_interleaved, opcode=websocket.ABNF.OPCODE_BINARY)
+        except Exception as exc:
+            self._failed = True
+            self.log.warning("Deepgram live send failed", error=str(exc))
+
+    def finish(self, timeout: float = 10.0) -> Optional[dict]:
+        """Flush the stream and return a batch-shaped payload, or None on failure."""
+
+        if self._ws and not self._failed and not self._open_evt.is_set():
+            # Still handshaking: give it until the connect deadline, then fall back to batch
+            self._open_evt.wait(timeout=max(0.0, self._connect_deadline - time.monotonic()))
+            with self._send_lock:
+                if not self._open_evt.is_set() and not self._failed:
+                    self._failed = True
+                    self._pending.clear()
+                    self.log.warning("Deepgram live stream did not connect in time")
+        if self._ws and not self._finishing and not self._failed:
+            self._finishing = True
+            try:
+                with self._send_lock:
+                    self._ws.send('{"type": "CloseStream"}')
+            except Exception as exc:
+                self._failed = True
+                self.log.warning("Deepgram live close request failed", error=str(exc))
+            else:
+                self._closed_evt.wait(timeout=timeout)
+                if not self._closed_evt.is_set():
+                    self._failed = True
+                    self.log.warning("Deepgram live stream did not finalize in time")
+        self.close()
+        if self._failed:
+            return None
+
+        channels: list[dict] = []
+        with self._results_lock:
+            for idx in range(self._channels):
+                confidences = self._confidences[idx]
+                channels.append(
+                    {
+                        "alternatives": [
+                            {
+                                "transcript": " ".join(self._transcripts[idx]),
+                                "confidence": sum(confidences) / len(confidences) if confidences else None,
+                                "words": list(self._words[idx]),
+                            }
+                        ]
+                    }
+                )
+        return {"results": {"channels": channels}}
+
+    def close(self) -> None:
+        self._finishing = True
+        try:
+            if self._ws:
+                with self._send_lock:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+        finally:
+            if self._ws_thread and self._ws_thread.is_alive():
+                try:
+                    self._ws_thread.join(timeout=1.0)
+                except Exception:
+                    pass
+            self._ws = None
+            self._ws_thread = None
+            with self._send_lock:
+                self._pending.clear()
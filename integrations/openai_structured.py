@@ -1,23 +1,128 @@
 from __future__ import annotations
 
-import json
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional
 
 import httpx
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from utils import jsonfast
 from utils.logging import get_logger, exception
 
+try:
+    import fastjsonschema  # type: ignore
+    _HAS_FASTJSONSCHEMA = True
+except Exception:
+    _HAS_FASTJSONSCHEMA = False
+
+
+@lru_cache(maxsize=4)
+def _read_prompt(path: str, mtime_ns: int) -> str:
+    # mtime_ns is part of the cache key so an edited prompt is picked up again
+    return Path(path).read_text(encoding="utf-8").strip()
+
 
 class OpenAIExtractionError(RuntimeError):
     """Raised when the OpenAI structured extraction fails."""
 
 
+class OpenAIFatalError(OpenAIExtractionError):
+    """Raised for 4xx responses (other than 408/429) that will not succeed on retry."""
+
+
+class OpenAIRetryableError(OpenAIExtractionError):
+    """Raised for 5xx, 408 and 429 responses and for refused, empty, unparsable or invalid model output.
+
+    Carries the server's Retry-After hint when there is one.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_RETRY_AFTER_MAX = 32.0
+_backoff = wait_exponential(multiplier=1, min=1, max=8)
+
+
+def _parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Sleep for the server-requested Retry-After when given, else back off exponentially."""
+
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return min(retry_after, _RETRY_AFTER_MAX)
+    return _backoff(retry_state)
+
+
 class GPTStructuredExtractor:
     """Calls the OpenAI Responses API to obtain structured answers for AmoCRM fields."""
 
     RESPONSES_URL = "https://api.openai.com/v1/responses"
+    PROMPT_CACHE_KEY = "amocrm_answers"
+    # Fixed response schema; built once per process, shared by every extractor
+    _SCHEMA: dict = {
+        "type": "object",
+        "properties": {
+            "answers": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question_id": {"type": "integer"},
+                        "text": {"type": ["string", "null"]},
+                        "enum_ids": {
+                            "type": "array",
+                            "items": {"type": "integer"},
+                            "minItems": 0,
+                        },
+                        "confidence": {"type": ["number", "null"]},
+                    },
+                    "required": ["question_id", "text", "enum_ids", "confidence"],
+                    "additionalProperties": False,
+                },
+            },
+            "conversation_summary": {
+                "type": "object",
+                "properties": {
+                    "highlights": {"type": "string"},
+                    "answered_questions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "minItems": 0,
+                    },
+                },
+                "required": ["highlights", "answered_questions"],
+                "additionalProperties": False,
+            },
+        },
+        "required": ["answers", "conversation_summary"],
+        "additionalProperties": False,
+    }
 
     def __init__(
         self,
@@ -26,6 +131,7 @@ class GPTStructuredExtractor:
         *,
         model: str = "gpt-5-mini",
         timeout: float = 120.0,
+        max_connections: int = 12,
     ) -> None:
         if not api_key:
             raise ValueError("OPENAI_API_KEY is required")
@@ -35,11 +141,40 @@ class GPTStructuredExtractor:
         self._api_key = api_key
         self._model = model
         self._questions = questions
-        self._client = httpx.Client(timeout=httpx.Timeout(timeout))
+        # One pooled connection per pipeline worker keeps TLS sessions warm between calls
+        self._client = httpx.Client(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_keepalive_connections=max_connections,
+                max_connections=max_connections * 2,
+                keepalive_expiry=300,
+            ),
+        )
         self._log = get_logger("integrations.openai")
         self._question_text = self._render_questions_for_prompt(questions)
         self._system_prompt = self._load_system_prompt()
         self._schema = self._build_schema()
+        # Strict mode can still slip on refusal paths; compile a local check once
+        self._validate = fastjsonschema.compile(self._schema) if _HAS_FASTJSONSCHEMA else None
+        # Everything except the transcript is fixed per extractor; build it once
+        self._user_prompt_prefix = (
+            "Questions to fill (each question_id matches AmoCRM field id):\n"
+            f"{self._question_text}\n\n"
+            "Transcript (flattened):\n"
+        )
+        self._system_message = {"role": "system", "content": self._system_prompt}
+        self._text_format = {
+            "format": {
+                "type": "json_schema",
+                "name": "amocrm_answers",
+                "strict": True,
+                "schema": self._schema,
+            }
+        }
+        self._headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+        }
 
     def close(self) -> None:
         try:
@@ -67,110 +202,69 @@ class GPTStructuredExtractor:
                         lines.append("  варианты для ответа: " + ", ".join(enum_parts))
         return "\n".join(lines)
 
-    def _build_schema(self) -> dict:
-        return {
-            "type": "object",
-            "properties": {
-                "answers": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "question_id": {"type": "integer"},
-                            "text": {"type": ["string", "null"]},
-                            "enum_ids": {
-                                "type": "array",
-                                "items": {"type": "integer"},
-                                "minItems": 0,
-                            },
-                            "confidence": {"type": ["number", "null"]},
-                        },
-                        "required": ["question_id", "text", "enum_ids", "confidence"],
-                        "additionalProperties": False,
-                    },
-                },
-                "conversation_summary": {
-                    "type": "object",
-                    "properties": {
-                        "highlights": {"type": "string"},
-                        "answered_questions": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "minItems": 0,
-                        },
-                    },
-                    "required": ["highlights", "answered_questions"],
-                    "additionalProperties": False,
-                },
-            },
-            "required": ["answers", "conversation_summary"],
-            "additionalProperties": False,
-        }
+    @classmethod
+    def _build_schema(cls) -> dict:
+        return cls._SCHEMA
 
     @retry(
-        retry=retry_if_exception_type((OpenAIExtractionError, httpx.HTTPError)),
+        retry=retry_if_exception_type((OpenAIRetryableError, httpx.TransportError)),
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=8),
+        wait=_wait_for_retry,
         reraise=True,
     )
     def extract_fields(self, transcript_text: str, utterances: Iterable[dict]) -> dict:
         """Return the structured answers extracted from transcript."""
 
-        utterances_json = json.dumps(list(utterances), ensure_ascii=False)
-        user_prompt = (
-            "Questions to fill (each question_id matches AmoCRM field id):\n"
-            f"{self._question_text}\n\n"
-            "Transcript (flattened):\n"
-            f"{transcript_text}\n\n"
-            "Transcript utterances (JSON):\n"
-            f"{utterances_json}"
+        utterances_json = jsonfast.dumps(list(utterances)).decode("utf-8")
+        user_prompt = "".join(
+            (self._user_prompt_prefix, transcript_text, "\n\nTranscript utterances (JSON):\n", utterances_json)
         )
 
         payload = {
             "model": self._model,
             "input": [
-                {"role": "system", "content": self._system_prompt},
+                self._system_message,
                 {"role": "user", "content": user_prompt},
             ],
-            "text": {
-                "format": {
-                    "type": "json_schema",
-                    "name": "amocrm_answers",
-                    "strict": True,
-                    "schema": self._schema,
-                }
-            },
-        }
-
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json",
+            # System prompt + question block form a stable prefix; a fixed key keeps
+            # every call routed to the same prompt cache instead of re-billing it.
+            "prompt_cache_key": self.PROMPT_CACHE_KEY,
+            "text": self._text_format,
         }
 
         try:
-            response = self._client.post(self.RESPONSES_URL, json=payload, headers=headers)
+            response = self._client.post(self.RESPONSES_URL, content=jsonfast.dumps(payload), headers=self._headers)
         except httpx.HTTPError:
             exception(self._log, "OpenAI request failed")
             raise
 
-        if response.status_code >= 400:
-            raise OpenAIExtractionError(f"OpenAI error {response.status_code}: {response.text}")
+        status = response.status_code
+        if status >= 400:
+            message = f"OpenAI error {status}: {response.text}"
+            if status >= 500 or status in (408, 429):
+                raise OpenAIRetryableError(message, retry_after=_parse_retry_after(response.headers))
+            raise OpenAIFatalError(message)
 
-        data = response.json()
+        data = jsonfast.loads(response.content)
         answers = self._extract_output_text(data)
         if answers is None:
-            raise OpenAIExtractionError("No structured output returned by OpenAI")
+            raise OpenAIRetryableError("No structured output returned by OpenAI")
 
         try:
-            parsed = json.loads(answers)
-        except json.JSONDecodeError as exc:
-            raise OpenAIExtractionError("Failed to parse OpenAI structured output") from exc
+            parsed = jsonfast.loads(answers)
+        except jsonfast.JSONDecodeError as exc:
+            raise OpenAIRetryableError("Failed to parse OpenAI structured output") from exc
+        if self._validate is not None:
+            try:
+                self._validate(parsed)
+            except fastjsonschema.JsonSchemaException as exc:
+                raise OpenAIRetryableError(f"OpenAI structured output failed schema validation: {exc}") from exc
         return parsed
 
     def _load_system_prompt(self, prompt_path: Optional[Path] = None) -> str:
         path = prompt_path or Path(__file__).with_name("openai_system_prompt.md")
         try:
-            content = path.read_text(encoding="utf-8").strip()
+            content = _read_prompt(str(path), path.stat().st_mtime_ns)
         except FileNotFoundError as exc:
             raise RuntimeError(
                 "System prompt file not found. Please create 'openai_system_prompt.md'."
@@ -189,13 +283,21 @@ class GPTStructuredExtractor:
         """Traverse Responses API output and return the structured JSON text."""
 
         outputs = payload.get("output") or []
+        # Common shape: one message whose first content part is the output text
+        try:
+            first = outputs[0]
+            chunk = first["content"][0]
+            if first["type"] == "message" and chunk["type"] == "output_text":
+                return chunk.get("text")
+        except (IndexError, KeyError, TypeError):
+            pass
         for item in outputs:
             if item.get("type") != "message":
                 continue
             for chunk in item.get("content", []):
                 if chunk.get("type") == "refusal":
                     detail = chunk.get("refusal") or "Request refused"
-                    raise OpenAIExtractionError(detail)
+                    raise OpenAIRetryableError(detail)
                 if chunk.get("type") == "output_text":
                     return chunk.get("text")
         return None
\ No newline at end of file
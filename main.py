@@ -14,27 +14,32 @@ import pjsua2 as pj
 from sip.endpoint import create_endpoint
 from sip.account import Account
 from sip.command_queue import CommandQueue
+from sip.scheduler import Scheduler
 from utils.logging import setup_logging, get_logger, exception
 
 from integrations.deepgram import DeepgramClient
 from integrations.openai_structured import GPTStructuredExtractor
 from integrations.amocrm import AmoCRMClient
 from processing.pipeline import CallProcessingPipeline
+from realtime.pool import RealtimePool
+
+_LOG = get_logger(__name__)
 
 
 async def pjsua_pump(ep: pj.Endpoint, cmdq: CommandQueue, stop_event: threading.Event):
     """Pump PJSUA2 events and execute queued commands on the main thread."""
-    log = get_logger(__name__)
     while not stop_event.is_set():
         try:
-            ep.libHandleEvents(10)          # Handle PJSIP events
-        except Exception:
-            exception(log, "libHandleEvents failed")
-        try:
-            cmdq.execute_pending()          # Execute queued main-thread commands (PJSUA2 API calls)
+            # Block in PJSIP's own poll while idle; just peek when commands are waiting
+            ep.libHandleEvents(0 if cmdq.has_pending() else 10)
         except Exception:
-            exception(log, "Command queue execution failed")
-        await asyncio.sleep(0.001)      # Give control back to loop
+            exception(_LOG, "libHandleEvents failed")
+        if cmdq.has_pending():
+            try:
+                cmdq.execute_pending()      # Execute queued main-thread commands (PJSUA2 API calls)
+            except Exception:
+                exception(_LOG, "Command queue execution failed")
+        await asyncio.sleep(0)          # Give control back to loop
 
 async def main():
     setup_logging()
@@ -67,16 +72,22 @@ async def main():
         log.error("Missing integration credentials. Set DEEPGRAM_API_KEY, OPENAI_API_KEY, AMOCRM_BASE_URL, AMOCRM_ACCESS_TOKEN")
         raise SystemExit(1)
 
+    max_workers = int(os.getenv("PIPELINE_MAX_WORKERS", "12"))
     pipeline = CallProcessingPipeline(
-        deepgram=DeepgramClient(deepgram_key, model=os.getenv("DEEPGRAM_MODEL", "nova-2")),
+        deepgram=DeepgramClient(
+            deepgram_key,
+            model=os.getenv("DEEPGRAM_MODEL", "nova-2"),
+            streaming=os.getenv("DEEPGRAM_STREAMING", "0").lower() not in ("0", "false", "no"),
+        ),
         extractor=GPTStructuredExtractor(
             openai_key,
             questions,
             model=os.getenv("OPENAI_STRUCTURED_MODEL", "gpt-5-mini"),
+            max_connections=max_workers,
         ),
         amocrm=AmoCRMClient(amocrm_base, amocrm_token),
         questions=questions,
-        max_workers=int(os.getenv("PIPELINE_MAX_WORKERS", "12")),
+        max_workers=max_workers,
     )
 
     ep = create_endpoint()
@@ -97,7 +108,15 @@ async def main():
     cred = pj.AuthCredInfo("digest", "*", sip_user, 0, sip_password)
     acc_cfg.sipConfig.authCreds.append(cred)
 
-    acc = Account(cmdq, pipeline=pipeline)
+    # Pre-connected realtime sessions; 0 disables the pool and every call connects on demand
+    realtime_pool = RealtimePool(
+        size=int(os.getenv("REALTIME_POOL_SIZE", "0")),
+        max_idle=float(os.getenv("REALTIME_POOL_MAX_IDLE", "600")),
+    )
+    realtime_pool.start()
+
+    scheduler = Scheduler()
+    acc = Account(cmdq, pipeline=pipeline, realtime_pool=realtime_pool, scheduler=scheduler)
     acc.create(acc_cfg)
 
     # Wait for reg in background (account signals semaphore internally)
@@ -141,7 +160,7 @@ async def main():
             # Proactively delete any remaining Call objects tracked by the account
             try:
                 if hasattr(acc, 'calls'):
-                    for c in list(acc.calls):
+                    for c in list(acc.calls.values()):
                         try:
                             c.delete()
                         except Exception:
@@ -173,6 +192,14 @@ async def main():
                     pass
                 gc.collect()
                 log.info("Stopped.")
+                try:
+                    realtime_pool.close()
+                except Exception:
+                    pass
+                try:
+                    scheduler.close()
+                except Exception:
+                    pass
                 try:
                     if pipeline:
                         pipeline.shutdown()
@@ -1,21 +1,32 @@
 from __future__ import annotations
 
-import json
 import os
+import re
+from collections import OrderedDict
 from datetime import datetime, timezone
+from itertools import chain
 from pathlib import Path
-from threading import Lock
+from threading import Lock, get_ident
 from typing import Any, Dict, Optional, Tuple
 
+from utils import jsonfast
 from utils.logging import get_logger
 
 _LOG = get_logger("processing.memory")
-_LOCK = Lock()
+_CACHE_LOCK = Lock()
+# Striped per-phone locks so unrelated callers never wait on each other
+_SLUG_LOCKS = tuple(Lock() for _ in range(32))
 _BASE_DIR = Path(os.getenv("CONVERSATION_SUMMARY_DIR", "logs/conversation_summaries"))
+# slug -> (latest file, its st_mtime_ns, parsed entry); guarded by _CACHE_LOCK
+_CACHE: "OrderedDict[str, Tuple[Path, int, Dict[str, Any]]]" = OrderedDict()
+_CACHE_SIZE = 1024
+# slug -> (base dir st_mtime_ns, sorted (index, path) list); guarded by _CACHE_LOCK
+_LIST_CACHE: "OrderedDict[str, Tuple[int, list[Tuple[int, Path]]]]" = OrderedDict()
+_NON_DIGIT_RE = re.compile(r"\D+")
 
 
 def _slug_for_phone(phone: str) -> str:
-    phone_slug = "".join(ch for ch in str(phone) if ch.isdigit())
+    phone_slug = _NON_DIGIT_RE.sub("", str(phone))
     if not phone_slug:
         phone_slug = str(phone).strip()
     if not phone_slug:
@@ -23,6 +34,10 @@ def _slug_for_phone(phone: str) -> str:
     return phone_slug
 
 
+def _lock_for(slug: str) -> Lock:
+    return _SLUG_LOCKS[hash(slug) % len(_SLUG_LOCKS)]
+
+
 def _legacy_path(slug: str) -> Path:
     return _BASE_DIR / f"{slug}.json"
 
@@ -31,8 +46,11 @@ def _indexed_path(slug: str, index: int) -> Path:
     return _BASE_DIR / f"{slug}_{index}.json"
 
 
-def _extract_index(slug: str, path: Path) -> Optional[int]:
-    stem = path.stem
+def _counter_path(slug: str) -> Path:
+    return _BASE_DIR / f"{slug}.idx"
+
+
+def _extract_index(slug: str, stem: str) -> Optional[int]:
     if stem == slug:
         return 0
     prefix = f"{slug}_"
@@ -45,22 +63,115 @@ def _extract_index(slug: str, path: Path) -> Optional[int]:
     return None
 
 
-def _list_summary_files(slug: str) -> list[Tuple[int, Path]]:
+def _scan_summary_files(slug: str) -> list[Tuple[int, Path]]:
+    # One scandir pass; DirEntry caches the file type so no per-entry stat is needed
+    legacy: list[Tuple[int, Path]] = []
     candidates: list[Tuple[int, Path]] = []
-    legacy = _legacy_path(slug)
-    if legacy.is_file():
-        candidates.append((0, legacy))
-    for path in _BASE_DIR.glob(f"{slug}_*.json"):
-        if not path.is_file():
-            continue
-        idx = _extract_index(slug, path)
-        if idx is None:
-            continue
-        candidates.append((idx, path))
+    prefix = f"{slug}_"
+    try:
+        with os.scandir(_BASE_DIR) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".json") or not name.startswith(slug):
+                    continue
+                stem = name[:-5]
+                if stem != slug and not stem.startswith(prefix):
+                    continue
+                if not entry.is_file():
+                    continue
+                idx = _extract_index(slug, stem)
+                if idx is None:
+                    continue
+                (legacy if stem == slug else candidates).append((idx, Path(entry.path)))
+    except OSError:
+        return []
+    # Legacy {slug}.json sorts ahead of an indexed file with the same index, as before
+    candidates = legacy + candidates
     candidates.sort(key=lambda item: item[0])
     return candidates
 
 
+def _list_summary_files(slug: str) -> list[Tuple[int, Path]]:
+    # Any create/rename/delete in the directory bumps its mtime, which invalidates the listing
+    try:
+        dir_mtime_ns = _BASE_DIR.stat().st_mtime_ns
+    except OSError:
+        return []
+    with _CACHE_LOCK:
+        cached = _LIST_CACHE.get(slug)
+        if cached is not None and cached[0] == dir_mtime_ns:
+            _LIST_CACHE.move_to_end(slug)
+            return list(cached[1])
+    candidates = _scan_summary_files(slug)
+    with _CACHE_LOCK:
+        _LIST_CACHE[slug] = (dir_mtime_ns, candidates)
+        _LIST_CACHE.move_to_end(slug)
+        while len(_LIST_CACHE) > _CACHE_SIZE:
+            _LIST_CACHE.popitem(last=False)
+    return list(candidates)
+
+
+def _read_counter(slug: str) -> Optional[int]:
+    """Return the sidecar counter if it is intact and nothing has been written past it."""
+
+    try:
+        raw = _counter_path(slug).read_bytes()
+    except OSError:
+        return None
+    if len(raw) != 4:
+        return None
+    count = int.from_bytes(raw, "little")
+    # A file at the counter position means someone wrote without bumping it
+    if _indexed_path(slug, count).exists():
+        return None
+    return count
+
+
+def _next_index(slug: str) -> int:
+    """Return the next free summary index, from the sidecar counter when it is trustworthy."""
+
+    count = _read_counter(slug)
+    if count is not None:
+        return count
+    existing = _list_summary_files(slug)
+    return existing[-1][0] + 1 if existing else 0
+
+
+def _latest_summary_path(slug: str) -> Optional[Path]:
+    count = _read_counter(slug)
+    if count:
+        path = _indexed_path(slug, count - 1)
+        if path.is_file():
+            return path
+    candidates = _list_summary_files(slug)
+    if not candidates:
+        return None
+    return max(candidates, key=lambda item: item[0])[1]
+
+
+def _copy_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    summary = entry["summary"]
+    return {
+        **entry,
+        "summary": {**summary, "answered_questions": list(summary.get("answered_questions") or [])},
+    }
+
+
+def _cache_get_locked(slug: str, path: Path, mtime_ns: int) -> Optional[Dict[str, Any]]:
+    cached = _CACHE.get(slug)
+    if cached is None or cached[0] != path or cached[1] != mtime_ns:
+        return None
+    _CACHE.move_to_end(slug)
+    return cached[2]
+
+
+def _cache_put_locked(slug: str, path: Path, mtime_ns: int, entry: Dict[str, Any]) -> None:
+    _CACHE[slug] = (path, mtime_ns, _copy_entry(entry))
+    _CACHE.move_to_end(slug)
+    while len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+
+
 def _normalize_summary(summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     if not isinstance(summary, dict):
         return None
@@ -76,13 +187,8 @@ def _normalize_summary(summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         or summary.get("answered_ids")
         or []
     )
-    answered: list[str] = []
-    for value in answered_raw:
-        text = str(value or "").strip()
-        if not text:
-            continue
-        if text not in answered:
-            answered.append(text)
+    # dict.fromkeys dedupes in O(n) while keeping first-seen order
+    answered = list(dict.fromkeys(text for text in (str(value or "").strip() for value in answered_raw) if text))
 
     return {
         "highlights": highlights,
@@ -101,14 +207,10 @@ def save_summary(phone: str, summary: Dict[str, Any], *, call_id: Optional[str]
     previous_entry = load_summary(phone)
     if previous_entry:
         previous_answers = previous_entry.get("summary", {}).get("answered_questions") or []
-        combined: list[str] = []
-        for answer in list(previous_answers) + list(normalized["answered_questions"]):
-            answer_text = str(answer or "").strip()
-            if not answer_text:
-                continue
-            if answer_text not in combined:
-                combined.append(answer_text)
-        normalized["answered_questions"] = combined
+        merged = chain(previous_answers, normalized["answered_questions"])
+        normalized["answered_questions"] = list(
+            dict.fromkeys(text for text in (str(answer or "").strip() for answer in merged) if text)
+        )
 
     slug = _slug_for_phone(phone)
 
@@ -126,25 +228,52 @@ def save_summary(phone: str, summary: Dict[str, Any], *, call_id: Optional[str]
     if call_id:
         payload["call_id"] = call_id
 
-    serialized = json.dumps(payload, ensure_ascii=False, indent=2)
+    serialized = jsonfast.dumps(payload, indent=True)
 
-    with _LOCK:
+    with _lock_for(slug):
         legacy = _legacy_path(slug)
         target_legacy = _indexed_path(slug, 0)
         if legacy.is_file() and not target_legacy.exists():
             try:
                 legacy.rename(target_legacy)
+                with _CACHE_LOCK:
+                    _LIST_CACHE.pop(slug, None)
             except Exception as exc:
                 _LOG.warning("Failed to migrate legacy summary file", error=str(exc), path=str(legacy))
 
-        existing = _list_summary_files(slug)
-        next_index = existing[-1][0] + 1 if existing else 0
+        next_index = _next_index(slug)
         target_path = _indexed_path(slug, next_index)
+        tmp_path = target_path.with_name(f"{target_path.name}.tmp.{os.getpid()}.{get_ident()}")
 
         try:
-            target_path.write_text(serialized, encoding="utf-8")
+            with open(tmp_path, "wb") as fp:
+                fp.write(serialized)
+            os.replace(tmp_path, target_path)
+            mtime_ns = target_path.stat().st_mtime_ns
         except Exception as exc:
             _LOG.warning("Failed to persist conversation summary", error=str(exc), path=str(target_path))
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+        else:
+            try:
+                _counter_path(slug).write_bytes((next_index + 1).to_bytes(4, "little"))
+            except OSError as exc:
+                _LOG.warning("Failed to update summary counter", error=str(exc), slug=slug)
+            with _CACHE_LOCK:
+                _LIST_CACHE.pop(slug, None)
+                _cache_put_locked(
+                    slug,
+                    target_path,
+                    mtime_ns,
+                    {
+                        "phone": phone,
+                        "updated_at": payload["updated_at"],
+                        "call_id": call_id,
+                        "summary": normalized,
+                    },
+                )
 
     return normalized
 
@@ -155,25 +284,25 @@ def load_summary(phone: str) -> Optional[Dict[str, Any]]:
 
     slug = _slug_for_phone(phone)
 
-    with _LOCK:
-        if not _BASE_DIR.exists():
-            return None
-
-        candidates = _list_summary_files(slug)
-        if not candidates:
+    with _lock_for(slug):
+        path = _latest_summary_path(slug)
+        if path is None:
             return None
 
-        index, path = max(candidates, key=lambda item: item[0])
-
         try:
-            raw = path.read_text(encoding="utf-8")
+            mtime_ns = path.stat().st_mtime_ns
+            with _CACHE_LOCK:
+                cached = _cache_get_locked(slug, path, mtime_ns)
+            if cached is not None:
+                return _copy_entry(cached)
+            raw = path.read_bytes()
         except Exception as exc:
             _LOG.warning("Failed to read conversation summary", error=str(exc), path=str(path))
             return None
 
     try:
-        data = json.loads(raw)
-    except json.JSONDecodeError as exc:
+        data = jsonfast.loads(raw)
+    except jsonfast.JSONDecodeError as exc:
         _LOG.warning("Failed to parse conversation summary", error=str(exc), path=str(path))
         return None
 
@@ -187,4 +316,6 @@ def load_summary(phone: str) -> Optional[Dict[str, Any]]:
         "call_id": data.get("call_id"),
         "summary": summary,
     }
+    with _CACHE_LOCK:
+        _cache_put_locked(slug, path, mtime_ns, result)
     return result
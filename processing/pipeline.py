@@ -1,23 +1,121 @@
 from __future__ import annotations
 
-import json
 import threading
 import time
 from concurrent.futures import Future, ThreadPoolExecutor
 import re
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 import httpx
 
+from utils import jsonfast
 from utils.logging import bind, exception, get_logger
 
 from integrations.amocrm import AmoCRMClient, AmoCRMError
-from integrations.deepgram import DeepgramClient
+from integrations.deepgram import DeepgramClient, DeepgramLiveStream
 from integrations.openai_structured import GPTStructuredExtractor
 from processing.conversation_memory import save_summary
 
+try:
+    from inotify_simple import INotify, flags  # type: ignore
+    _HAS_INOTIFY = True
+except Exception:
+    _HAS_INOTIFY = False
+
+
+_PROMPT_HEADER = "Transcript (flattened):\n"
+_ACTIVE_STRIPES = 16
+# Audit filename parts: keep letters/digits (plus "-" and "_" where allowed)
+_NON_SLUG_RE = re.compile(r"[^\w-]+")
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+_NON_DIGIT_RE = re.compile(r"\D+")
+
+def _utc_timestamps() -> tuple[str, str]:
+    """Return (ISO 8601, filename slug) for the current UTC time without strftime."""
+
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    micros = nanos // 1000
+    tm = time.gmtime(seconds)
+    date = f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+    clock = f"{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+    # Same shape as datetime.isoformat(): the fraction is omitted when it is zero
+    iso = f"{date}T{clock}.{micros:06d}+00:00" if micros else f"{date}T{clock}+00:00"
+    slug = f"{date.replace('-', '')}T{clock.replace(':', '')}{micros:06d}Z"
+    return iso, slug
+
+
+def _watch_for_close(directory: Path):
+    if not _HAS_INOTIFY:
+        return None
+    try:
+        watcher = INotify()
+        watcher.add_watch(str(directory), flags.CLOSE_WRITE | flags.MOVED_TO)
+        return watcher
+    except OSError:
+        return None
+
+
+def _wait_for_close(watcher, name: str, timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds; True if ``name`` was closed after writing or moved in."""
+
+    if watcher is None:
+        time.sleep(timeout)
+        return False
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            events = watcher.read(timeout=max(1, int(remaining * 1000)))
+        except OSError:
+            time.sleep(max(remaining, 0))
+            return False
+        if any(event.name == name for event in events):
+            return True
+
+
+def _text_field(field_id: int, answer: dict) -> Optional[dict]:
+    text = answer.get("text")
+    if isinstance(text, str):
+        text = text.strip()
+    if not text:
+        return None
+    return {"field_id": field_id, "values": [{"value": text}]}
+
+
+def _select_field(field_id: int, answer: dict) -> Optional[dict]:
+    enum_ids = answer.get("enum_ids") or []
+    try:
+        enum_value = int(enum_ids[0]) if enum_ids and enum_ids[0] is not None else None
+    except (TypeError, ValueError):
+        enum_value = None
+    if enum_value is None:
+        return None
+    return {"field_id": field_id, "values": [{"enum_id": enum_value}]}
+
+
+def _multiselect_field(field_id: int, answer: dict) -> Optional[dict]:
+    valid_enums: list[int] = []
+    for raw in answer.get("enum_ids") or []:
+        try:
+            valid_enums.append(int(str(raw)))
+        except (TypeError, ValueError):
+            continue
+    if not valid_enums:
+        return None
+    return {"field_id": field_id, "values": [{"enum_id": eid} for eid in valid_enums]}
+
+
+# Unknown types fall back to text, as before
+_FIELD_BUILDERS: Dict[str, Callable[[int, dict], Optional[dict]]] = {
+    "text": _text_field,
+    "textarea": _text_field,
+    "select": _select_field,
+    "multiselect": _multiselect_field,
+}
+
 
 class CallProcessingPipeline:
     """Coordinates post-call processing: transcription, extraction, CRM update."""
@@ -36,17 +134,19 @@ class CallProcessingPipeline:
         self._extractor = extractor
         self._amocrm = amocrm
         self._questions = questions
-        self._question_index: Dict[int, dict] = {
-            int(q["id"]): q
+        # Question type is fixed per field, so resolve its converter once up front
+        self._field_builders: Dict[int, Callable[[int, dict], Optional[dict]]] = {
+            int(q["id"]): _FIELD_BUILDERS.get((q.get("type") or "text").lower(), _text_field)
             for section in questions
             for q in section.get("questions", [])
             if "id" in q
         }
         self._log = get_logger("processing.pipeline")
         self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
-        self._active_numbers: set[str] = set()
-        self._lock = threading.Lock()
-        self._audit_lock = threading.Lock()
+        # Active phones, striped by hash so unrelated numbers never share a lock
+        self._active_stripes: tuple[tuple[threading.Lock, set[str]], ...] = tuple(
+            (threading.Lock(), set()) for _ in range(_ACTIVE_STRIPES)
+        )
         default_dir = Path("logs") / "postprocessing"
         raw_path = Path(audit_log_path) if audit_log_path else default_dir
         self._audit_prefix = "postprocessing"
@@ -70,26 +170,51 @@ class CallProcessingPipeline:
             )
             self._audit_dir = None
 
+    def _active_stripe(self, phone: str) -> tuple[threading.Lock, set[str]]:
+        return self._active_stripes[hash(phone) % _ACTIVE_STRIPES]
+
     def is_processing(self, phone: str) -> bool:
         normalized = phone or ""
-        with self._lock:
-            return normalized in self._active_numbers
+        lock, active = self._active_stripe(normalized)
+        with lock:
+            return normalized in active
+
+    def open_live_transcript(self, sample_rate: int, *, call_id: Optional[str] = None) -> Optional[DeepgramLiveStream]:
+        """Start live transcription of the stereo recording, if enabled."""
+        try:
+            return self._deepgram.open_stream(sample_rate, context={"call_id": str(call_id or "?")})
+        except Exception:
+            exception(self._log, "Failed to open live transcript", call_id=str(call_id or "?"))
+            return None
 
-    def submit(self, phone: str, wav_path: str, *, call_id: Optional[str] = None) -> None:
+    def submit(
+        self,
+        phone: str,
+        wav_path: str,
+        *,
+        call_id: Optional[str] = None,
+        live_transcript: Optional[DeepgramLiveStream] = None,
+    ) -> None:
         if not phone or not wav_path:
             self._log.warning("Skipping pipeline submission due to missing phone/path", phone=phone, path=wav_path)
+            if live_transcript:
+                live_transcript.close()
             return
 
         normalized = phone
-        with self._lock:
-            if normalized in self._active_numbers:
-                self._log.info("Pipeline already running for phone", phone=normalized)
-                return
-            self._active_numbers.add(normalized)
+        lock, active = self._active_stripe(normalized)
+        with lock:
+            already_running = normalized in active
+            active.add(normalized)
+        if already_running:
+            self._log.info("Pipeline already running for phone", phone=normalized)
+            if live_transcript:
+                live_transcript.close()
+            return
 
         log = bind(self._log, phone=normalized, call_id=str(call_id or "?"))
         log.info("Pipeline scheduled", path=wav_path)
-        future = self._executor.submit(self._run_pipeline, normalized, wav_path, log)
+        future = self._executor.submit(self._run_pipeline, normalized, wav_path, log, live_transcript)
         future.add_done_callback(lambda f: self._on_done(normalized, f))
 
     def _on_done(self, phone: str, future: Future) -> None:
@@ -99,10 +224,17 @@ class CallProcessingPipeline:
         except Exception:
             exception(self._log, "Pipeline task failed", phone=phone)
         finally:
-            with self._lock:
-                self._active_numbers.discard(phone)
+            lock, active = self._active_stripe(phone)
+            with lock:
+                active.discard(phone)
 
-    def _run_pipeline(self, phone: str, wav_path: str, log) -> None:
+    def _run_pipeline(
+        self,
+        phone: str,
+        wav_path: str,
+        log,
+        live_transcript: Optional[DeepgramLiveStream] = None,
+    ) -> None:
         transcript_text: str | None = None
         structured: dict | None = None
         custom_fields: list[dict] | None = None
@@ -117,13 +249,14 @@ class CallProcessingPipeline:
                 call_id = None
         try:
             self._ensure_recording_ready(wav_path, log)
-            payload = self._deepgram.transcribe(wav_path)
+            payload = self._finish_live_transcript(live_transcript, log)
+            if payload is None:
+                payload = self._deepgram.transcribe(wav_path)
             utterances = self._deepgram.extract_utterances(payload)
             transcript_text = self._deepgram.flatten_utterances(utterances)
-            prompt_context = (
-                "Transcript (flattened):\n"
-                f"{self._sanitize_transcript(transcript_text)}"
-            )
+            # Only the audit log reads the sanitized copy; skip building it when auditing is off
+            if self._audit_dir:
+                prompt_context = "".join((_PROMPT_HEADER, self._sanitized_transcript(utterances)))
 
             structured = self._extractor.extract_fields(transcript_text, utterances)
             self._store_conversation_summary(phone, structured, call_id, log)
@@ -220,6 +353,20 @@ class CallProcessingPipeline:
             )
             raise
 
+    def _finish_live_transcript(self, live_transcript: Optional[DeepgramLiveStream], log) -> Optional[dict]:
+        if not live_transcript:
+            return None
+        try:
+            payload = live_transcript.finish()
+        except Exception:
+            exception(log, "Live transcript finalization failed")
+            return None
+        if payload is None:
+            log.warning("Live transcript unavailable; falling back to batch transcription")
+        else:
+            log.info("Using live transcript")
+        return payload
+
     def _store_conversation_summary(self, phone: str, structured: Optional[dict], call_id: Optional[str], log) -> None:
         if not structured or not isinstance(structured, dict):
             return
@@ -251,9 +398,9 @@ class CallProcessingPipeline:
         if not self._audit_dir:
             return
 
-        timestamp = datetime.now(timezone.utc)
+        ts_iso, ts_slug = _utc_timestamps()
         entry = {
-            "timestamp": timestamp.isoformat(),
+            "timestamp": ts_iso,
             "phone": phone,
             "call_id": call_id,
             "status": status,
@@ -267,31 +414,26 @@ class CallProcessingPipeline:
             entry["error"] = error
 
         try:
-            serialized = json.dumps(entry, ensure_ascii=False)
+            # default=str coerces anything non-serializable in the GPT/AmoCRM payloads
+            serialized = jsonfast.dumps(entry, default=str)
         except Exception:
-            # Fallback: attempt to coerce problematic fields to string
-            safe_entry = dict(entry)
-            if structured is not None:
-                safe_entry["gpt_structured"] = json.loads(json.dumps(structured, default=str))
-            if custom_fields is not None:
-                safe_entry["amo_custom_fields"] = json.loads(json.dumps(custom_fields, default=str))
-            serialized = json.dumps(safe_entry, ensure_ascii=False)
-
-        target_path = self._build_audit_path(timestamp, phone, call_id, status)
+            self._log.warning("Failed to serialize audit entry", status=status)
+            return
+
+        target_path = self._build_audit_path(ts_slug, phone, call_id, status)
         if target_path is None:
             return
 
-        with self._audit_lock:
-            try:
-                target_path.parent.mkdir(parents=True, exist_ok=True)
-                with target_path.open("w", encoding="utf-8") as fp:
-                    fp.write(serialized)
-            except Exception:
-                self._log.warning("Failed to write audit log", path=str(target_path))
+        try:
+            # mkdir(exist_ok=True) is race-safe and each entry gets its own file, so no lock
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            target_path.write_bytes(serialized)
+        except Exception:
+            self._log.warning("Failed to write audit log", path=str(target_path))
 
     def _build_audit_path(
         self,
-        timestamp: datetime,
+        ts_slug: str,
         phone: Optional[str],
         call_id: Optional[str],
         status: str,
@@ -300,53 +442,58 @@ class CallProcessingPipeline:
             return None
 
         prefix = self._audit_prefix or "postprocessing"
-        prefix_slug = "".join(ch for ch in prefix if ch.isalnum() or ch in {"-", "_"}) or "postprocessing"
-        ts_slug = timestamp.strftime("%Y%m%dT%H%M%S%fZ")
+        prefix_slug = _NON_SLUG_RE.sub("", prefix) or "postprocessing"
         phone_raw = phone or "unknown"
-        phone_slug = "".join(ch for ch in str(phone_raw) if ch.isdigit())
+        phone_slug = _NON_DIGIT_RE.sub("", str(phone_raw))
         if not phone_slug:
             phone_slug = "unknown"
         slug_parts = [prefix_slug, ts_slug, phone_slug]
 
         if call_id:
-            call_slug = "".join(ch for ch in str(call_id) if ch.isalnum())
+            call_slug = _NON_ALNUM_RE.sub("", str(call_id))
             if call_slug:
                 slug_parts.append(call_slug)
 
-        status_slug = "".join(ch for ch in status if ch.isalnum() or ch in {"-", "_"}) or "status"
+        status_slug = _NON_SLUG_RE.sub("", status) or "status"
         slug_parts.append(status_slug)
 
         filename = "_".join(slug_parts) + ".json"
         return self._audit_dir / filename
 
-    def _sanitize_transcript(self, transcript: Optional[str]) -> str:
-        if not transcript:
-            return ""
-
-        pattern = re.compile(r"^\[(?P<label>[^\]@]+)(?:\s*@[^\]]+)?\]\s*(?P<text>.*)")
-        cleaned_lines: list[str] = []
-        for raw_line in transcript.splitlines():
-            match = pattern.match(raw_line)
-            if match:
-                label = (match.group("label") or "").strip() or "Спикер"
-                text = (match.group("text") or "").strip()
-                cleaned_lines.append(f"{label}: {text}" if text else f"{label}:")
-            else:
-                cleaned_lines.append(raw_line.strip())
-        return "\n".join(cleaned_lines)
+    def _sanitized_transcript(self, utterances: list[dict]) -> str:
+        """Render "Label: text" lines straight from utterances, without timestamps."""
+
+        speaker_label = self._deepgram.speaker_label
+        lines: list[str] = []
+        for entry in utterances:
+            label = speaker_label(entry).strip() or "Спикер"
+            text = str(entry.get("text", "")).strip()
+            lines.append(f"{label}: {text}" if text else f"{label}:")
+        return "\n".join(lines)
 
     def _ensure_recording_ready(self, wav_path: str, log) -> None:
         path = Path(wav_path)
-        deadline = time.time() + 10.0
-        last_size = -1
-        while time.time() < deadline:
-            if path.is_file():
-                size = path.stat().st_size
-                if size > 0 and size == last_size:
+        watcher = _watch_for_close(path.parent)
+        try:
+            deadline = time.time() + 10.0
+            last_size = -1
+            while time.time() < deadline:
+                if path.is_file():
+                    size = path.stat().st_size
+                    if size > 0 and size == last_size:
+                        return
+                    last_size = size
+                # The recorder closing the file is the real "done" signal; size polling
+                # only covers a close that happened before the watch was added.
+                if _wait_for_close(watcher, path.name, 0.3) and path.is_file() and path.stat().st_size > 0:
                     return
-                last_size = size
-            time.sleep(0.3)
-        log.warning("Recording may be incomplete", path=str(path), size=str(path.stat().st_size if path.exists() else 0))
+            log.warning("Recording may be incomplete", path=str(path), size=str(path.stat().st_size if path.exists() else 0))
+        finally:
+            if watcher is not None:
+                try:
+                    watcher.close()
+                except Exception:
+                    pass
 
     def _convert_to_custom_fields(self, structured: dict) -> list[dict]:
         answers = structured.get("answers") or []
@@ -359,59 +506,12 @@ class CallProcessingPipeline:
                 qid_int = int(qid)
             except (TypeError, ValueError):
                 continue
-            question = self._question_index.get(qid_int)
-            if not question:
+            build = self._field_builders.get(qid_int)
+            if build is None:
                 continue
-
-            qtype = (question.get("type") or "text").lower()
-            text = answer.get("text")
-            if isinstance(text, str):
-                text = text.strip()
-            enum_ids = answer.get("enum_ids") or []
-
-            if qtype in {"text", "textarea"}:
-                if not text:
-                    continue
-                result.append({
-                    "field_id": qid_int,
-                    "values": [{"value": text}],
-                })
-            elif qtype == "select":
-                enum_id = None
-                if enum_ids:
-                    enum_id = enum_ids[0]
-                try:
-                    enum_value = int(enum_id) if enum_id is not None else None
-                except (TypeError, ValueError):
-                    enum_value = None
-                if enum_value is None:
-                    continue
-                result.append({
-                    "field_id": qid_int,
-                    "values": [{"enum_id": enum_value}],
-                })
-            elif qtype == "multiselect":
-                valid_enums: list[int] = []
-                for raw in enum_ids:
-                    try:
-                        val = int(str(raw))
-                    except (TypeError, ValueError):
-                        continue
-                    valid_enums.append(val)
-                if not valid_enums:
-                    continue
-                result.append({
-                    "field_id": qid_int,
-                    "values": [{"enum_id": int(eid)} for eid in valid_enums],
-                })
-            else:
-                # Fallback: treat as text if we have a value
-                if not text:
-                    continue
-                result.append({
-                    "field_id": qid_int,
-                    "values": [{"value": text}],
-                })
+            field = build(qid_int, answer)
+            if field is not None:
+                result.append(field)
         return result
 
     def shutdown(self) -> None:
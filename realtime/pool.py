@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from realtime.session import RealtimeClient
+from utils.logging import get_logger, exception
+
+
+def _discard_audio(audio: bytes, sample_rate: int) -> None:
+    pass
+
+
+class RealtimePool:
+    """Keeps a few pre-connected realtime sessions so a new call skips the TLS/WebSocket handshake.
+
+    A session carries its own conversation, so each one is handed to exactly one call and is
+    never returned; the pool only ever holds fresh spares and refills in the background.
+    """
+
+    def __init__(self, size: int = 1, max_idle: float = 600.0, retry_delay: float = 5.0):
+        self._size = max(0, size)
+        self._max_idle = max_idle
+        self._retry_delay = retry_delay
+        self._idle: deque[tuple[float, RealtimeClient]] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.log = get_logger("realtime.pool")
+
+    def start(self) -> None:
+        if self._size <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="realtime-pool", daemon=True)
+        self._thread.start()
+
+    def acquire(self, **callbacks) -> RealtimeClient:
+        """Return a warm session bound to ``callbacks``, or a new unconnected client if none is ready."""
+        client: Optional[RealtimeClient] = None
+        stale: list[RealtimeClient] = []
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                created, candidate = self._idle.popleft()
+                if self._usable(created, candidate, now):
+                    client = candidate
+                    break
+                stale.append(candidate)
+        self._wakeup.set()
+        for old in stale:
+            old.close()
+        if client is None:
+            return RealtimeClient(**callbacks)
+        client.bind_callbacks(**callbacks)
+        client.log.info("Using pre-connected realtime session")
+        return client
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        with self._lock:
+            idle = [client for _, client in self._idle]
+            self._idle.clear()
+        for client in idle:
+            client.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._prune()
+            with self._lock:
+                missing = self._size - len(self._idle)
+            if missing <= 0:
+                self._wakeup.wait(timeout=30.0)
+                self._wakeup.clear()
+                continue
+
+            client = RealtimeClient(on_audio=_discard_audio, context={"call_id": "spare"})
+            try:
+                client.connect()
+            except Exception:
+                exception(self.log, "Failed to pre-connect realtime session")
+                client.close()
+                self._stop.wait(self._retry_delay)
+                continue
+            with self._lock:
+                if not self._stop.is_set():
+                    self._idle.append((time.monotonic(), client))
+                    client = None
+            if client is not None:
+                client.close()
+
+    def _usable(self, created: float, client: RealtimeClient, now: float) -> bool:
+        return now - created < self._max_idle and client.connected
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        stale: list[RealtimeClient] = []
+        with self._lock:
+            keep: deque[tuple[float, RealtimeClient]] = deque()
+            for created, client in self._idle:
+                if self._usable(created, client, now):
+                    keep.append((created, client))
+                else:
+                    stale.append(client)
+            self._idle = keep
+        for client in stale:
+            client.close()
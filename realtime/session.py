@@ -1,11 +1,63 @@
-import base64
-import json
+import audioop
 import os
+import queue
 import threading
 from typing import Callable, Optional
 
 import websocket
-from utils.logging import get_logger, bind
+from utils import jsonfast
+from utils.logging import get_logger, bind, exception
+
+try:
+    # SIMD-accelerated drop-in for the stdlib codec
+    import pybase64 as base64  # type: ignore
+except Exception:
+    import base64
+
+_APPEND_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = b'"}'
+_DELTA_PREFIX = '{"type":"response.output_audio.delta"'
+_INPUT_RATE = 24000
+# PCM16 mono at _INPUT_RATE
+_INPUT_BYTES_PER_MS = _INPUT_RATE * 2 // 1000
+_INSTRUCTIONS_PATH = os.path.join(os.path.dirname(__file__), "system_prompt.md")
+# (st_mtime_ns, stripped text); re-read only when the file changes
+_instructions_cache: Optional[tuple[int, str]] = None
+
+
+def _string_field(message: str, key: str) -> Optional[str]:
+    start = message.find(key)
+    if start < 0:
+        return None
+    start += len(key)
+    end = message.find('"', start)
+    if end < 0:
+        return None
+    value = message[start:end]
+    # Escaped content needs a real JSON decode
+    return None if "\\" in value else value
+
+
+def _peek_audio_delta(message) -> Optional[dict]:
+    """Pull delta/item_id out of an audio delta frame with plain string scans, or None to fall back to JSON."""
+    if not isinstance(message, str) or not message.startswith(_DELTA_PREFIX):
+        return None
+    delta = _string_field(message, '"delta":"')
+    if delta is None:
+        return None
+    return {"delta": delta, "item_id": _string_field(message, '"item_id":"')}
+
+
+def _load_instructions() -> str:
+    global _instructions_cache
+    mtime_ns = os.stat(_INSTRUCTIONS_PATH).st_mtime_ns
+    cached = _instructions_cache
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    with open(_INSTRUCTIONS_PATH, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    _instructions_cache = (mtime_ns, text)
+    return text
 
 
 class RealtimeClient:
@@ -24,97 +76,209 @@ class RealtimeClient:
         on_speech_started: Optional[Callable[[dict], None]] = None,
         on_assistant_stream_start: Optional[Callable[[str], None]] = None,
     ):
-        self.on_audio = on_audio
-        self.on_text = on_text or (lambda t: None)
-        self.on_error = on_error or (lambda e: None)
-        self.on_audio_done = on_audio_done or (lambda: None)
-        self.on_speech_started = on_speech_started or (lambda ev: None)
-        self.on_assistant_stream_start = on_assistant_stream_start or (lambda item_id: None)
+        self.bind_callbacks(
+            on_audio,
+            on_text=on_text,
+            on_error=on_error,
+            context=context,
+            on_audio_done=on_audio_done,
+            on_speech_started=on_speech_started,
+            on_assistant_stream_start=on_assistant_stream_start,
+        )
 
         self._ws: Optional[websocket.WebSocketApp] = None
         self._open_evt = threading.Event()
         self._send_lock = threading.Lock()
         self._ws_thread: Optional[threading.Thread] = None
-        self._buffered_audio: bytearray = bytearray()
+        self._in_q: "queue.SimpleQueue[Optional[str | bytes]]" = queue.SimpleQueue()
+        self._consumer_thread: Optional[threading.Thread] = None
         self._current_sr = 8000     # PCMU (G.711 µ-law)
         self._current_assistant_item_id: Optional[str] = None
-        
+        # Outbound PCM is batched into ~REALTIME_SEND_BATCH_MS appends; 0 sends every chunk as-is
+        self.send_batch_ms = max(0, int(os.getenv("REALTIME_SEND_BATCH_MS", "60")))
+        self._send_batch_bytes = self.send_batch_ms * _INPUT_BYTES_PER_MS
+        self._out_accum = bytearray()
+        # "pcmu" sends caller audio as 8 kHz G.711 µ-law (a sixth of the PCM16 bytes); wideband codecs want "pcm"
+        self.input_format = os.getenv("REALTIME_INPUT_FORMAT", "pcm").lower()
+        self._ulaw_rate_state = None
+        # Non-audio events; audio deltas are matched before this lookup
+        self._handlers: dict[str, Callable[[dict], None]] = {
+            "response.output_audio.done": self._handle_audio_done,
+            "response.done": self._handle_audio_done,
+            "response.text.delta": self._handle_text_delta,
+            "input_audio_buffer.speech_started": self._handle_speech_started,
+            "error": self._handle_error,
+        }
+
+    def bind_callbacks(
+        self,
+        on_audio: Callable[[bytes, int], None],
+        on_text: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[str], None]] = None,
+        context: Optional[dict[str, str]] = None,
+        on_audio_done: Optional[Callable[[], None]] = None,
+        on_speech_started: Optional[Callable[[dict], None]] = None,
+        on_assistant_stream_start: Optional[Callable[[str], None]] = None,
+    ):
+        """(Re)attach event callbacks and log context; used when a pooled session is handed to a call."""
+        self.on_audio = on_audio
+        self.on_text = on_text or (lambda t: None)
+        self.on_error = on_error or (lambda e: None)
+        self.on_audio_done = on_audio_done or (lambda: None)
+        self.on_speech_started = on_speech_started or (lambda ev: None)
+        self.on_assistant_stream_start = on_assistant_stream_start or (lambda item_id: None)
+
         self.log = get_logger("realtime")
         if context:
             self.log = bind(self.log, **context)
 
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and self._open_evt.is_set()
+
     def connect(self):
+        if self.connected:
+            # Pre-connected by RealtimePool
+            return
         url = f"wss://api.openai.com/v1/realtime?model={os.environ.get("OPENAI_MODEL", "gpt-realtime")}"
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
         headers = ["Authorization: Bearer " + api_key]
+        self._in_q = queue.SimpleQueue()
 
         def on_open(ws):
             self._open_evt.set()
             self.log.info("Realtime connected")
 
         def on_message(ws, message):
-            try:
-                data = json.loads(message)
-            except Exception:
-                return
-            t = data.get("type")
-            # Collect audio deltas
-            if t == "response.output_audio.delta":
-                b64 = data.get("delta") or ""
-                if b64:
-                    chunk = base64.b64decode(b64)
-                    if chunk:
-                        self.on_audio(chunk, self._current_sr)
-                # Track assistant message item id if present and signal start once
-                item_id = data.get("item_id")
-                if item_id and item_id != self._current_assistant_item_id:
-                    self._current_assistant_item_id = item_id
-                    try:
-                        self.on_assistant_stream_start(item_id)
-                    except Exception:
-                        pass
-            elif t in ("response.output_audio.done", "response.done"):
-                # Signal that current response audio finished
-                self.on_audio_done()
-            elif t == "response.text.delta":
-                self.on_text(data.get("delta", ""))
-            elif t == "input_audio_buffer.speech_started":
-                # Server VAD detected speech — client should interrupt playback and truncate server-side audio
-                try:
-                    self.on_speech_started(data)
-                except Exception:
-                    pass
-            elif t == "error":
-                self.on_error(data.get("error", {}).get("message", str(data)))
+            # Decoding happens on the consumer thread so the socket keeps servicing pings
+            self._in_q.put(message)
 
         def on_error(ws, err):
             self.on_error(str(err))
             self.log.error("Realtime WS error", error=str(err))
 
+        def on_close(ws, status_code, reason):
+            self._open_evt.clear()
+
         self._ws = websocket.WebSocketApp(
             url,
             header=headers,
             on_open=on_open,
             on_message=on_message,
             on_error=on_error,
+            on_close=on_close,
         )
 
-        t = threading.Thread(target=self._ws.run_forever, kwargs=dict(ping_interval=20, ping_timeout=10), daemon=True)
+        # websocket-client never offers permessage-deflate; also skip re-validating UTF-8 on every inbound frame
+        t = threading.Thread(
+            target=self._ws.run_forever,
+            kwargs=dict(ping_interval=20, ping_timeout=10, skip_utf8_validation=True),
+            daemon=True,
+        )
         t.start()
         self._ws_thread = t
         self._open_evt.wait(timeout=10)
         if not self._open_evt.is_set():
             self.log.error("Failed to connect to gpt-realtime")
             raise RuntimeError("Failed to connect to gpt-realtime")
+        # Anything received before this point waits in the queue
+        self._consumer_thread = threading.Thread(target=self._consume, args=(self._in_q,), daemon=True)
+        self._consumer_thread.start()
         
 
+    def _consume(self, in_q: queue.SimpleQueue):
+        # Deltas already waiting in the queue are merged into one on_audio call;
+        # nothing is held back once the queue runs dry.
+        audio = bytearray()
+        while True:
+            if audio:
+                try:
+                    message = in_q.get_nowait()
+                except queue.Empty:
+                    self._emit_audio(audio)
+                    continue
+            else:
+                message = in_q.get()
+            if message is None:
+                self._emit_audio(audio)
+                return
+            # Audio deltas dominate inbound traffic; skip the full parse for them
+            delta = _peek_audio_delta(message)
+            if delta is not None:
+                try:
+                    self._handle_audio_delta(delta, audio)
+                except Exception:
+                    exception(self.log, "Realtime event handling failed", type="response.output_audio.delta")
+                continue
+            try:
+                data = jsonfast.loads(message)
+            except Exception:
+                continue
+            try:
+                self._handle_event(data, audio)
+            except Exception:
+                exception(self.log, "Realtime event handling failed", type=str(data.get("type")))
+
+    def _emit_audio(self, audio: bytearray):
+        if not audio:
+            return
+        chunk = bytes(audio)
+        audio.clear()
+        try:
+            self.on_audio(chunk, self._current_sr)
+        except Exception:
+            exception(self.log, "Realtime audio callback failed")
+
+    def _handle_event(self, data: dict, audio: bytearray):
+        t = data.get("type")
+        # Collect audio deltas
+        if t == "response.output_audio.delta":
+            self._handle_audio_delta(data, audio)
+            return
+        # Anything else is ordered after the audio that preceded it
+        self._emit_audio(audio)
+        handler = self._handlers.get(t)
+        if handler is not None:
+            handler(data)
+
+    def _handle_audio_delta(self, data: dict, audio: bytearray):
+        b64 = data.get("delta")
+        if b64:
+            audio.extend(base64.b64decode(b64))
+        # Track assistant message item id if present and signal start once
+        item_id = data.get("item_id")
+        if item_id and item_id != self._current_assistant_item_id:
+            self._current_assistant_item_id = item_id
+            self._emit_audio(audio)
+            try:
+                self.on_assistant_stream_start(item_id)
+            except Exception:
+                pass
+
+    def _handle_audio_done(self, data: dict):
+        # Signal that current response audio finished
+        self.on_audio_done()
+
+    def _handle_text_delta(self, data: dict):
+        self.on_text(data.get("delta", ""))
+
+    def _handle_speech_started(self, data: dict):
+        # Server VAD detected speech — client should interrupt playback and truncate server-side audio
+        try:
+            self.on_speech_started(data)
+        except Exception:
+            pass
+
+    def _handle_error(self, data: dict):
+        self.on_error(data.get("error", {}).get("message", str(data)))
+
     def send(self, obj: dict):
         if self._ws:
             with self._send_lock:
-                self._ws.send(json.dumps(obj))
+                self._ws.send(jsonfast.dumps(obj), opcode=websocket.ABNF.OPCODE_TEXT)
 
     # Expose current assistant item id for truncation calls
     @property
@@ -133,7 +297,11 @@ class RealtimeClient:
                 "output_modalities": ["audio"],
                 "audio": {
                     "input": {
-                        "format": {"type": "audio/pcm", "rate": 24000},
+                        "format": (
+                            {"type": "audio/pcmu"}
+                            if self.input_format == "pcmu"
+                            else {"type": "audio/pcm", "rate": _INPUT_RATE}
+                        ),
                         "turn_detection": {
                             "type": "semantic_vad",
                             "eagerness": vad_eagerness,
@@ -152,12 +320,7 @@ class RealtimeClient:
             
         # Load system prompt from external Markdown file
         try:
-            base_dir = os.path.dirname(__file__)
-            instructions_path = os.path.join(base_dir, "system_prompt.md")
-
-            with open(instructions_path, "r", encoding="utf-8") as f:
-                instructions_text = f.read().strip()
-
+            instructions_text = _load_instructions()
             if instructions_text:
                 event["session"]["instructions"] = instructions_text
         except Exception as e:
@@ -165,8 +328,26 @@ class RealtimeClient:
         self.send(event)
 
     def send_audio_chunk(self, pcm16_mono_bytes: bytes):
-        evt = {"type": "input_audio_buffer.append", "audio": base64.b64encode(pcm16_mono_bytes).decode("ascii")}
-        self.send(evt)
+        # Called from the single streaming thread only; the tail reader delivers audio as it is
+        # recorded, so a size threshold doubles as the time threshold
+        if self._send_batch_bytes and (self._out_accum or len(pcm16_mono_bytes) < self._send_batch_bytes):
+            self._out_accum += pcm16_mono_bytes
+            if len(self._out_accum) < self._send_batch_bytes:
+                return
+            pcm16_mono_bytes = bytes(self._out_accum)
+            self._out_accum.clear()
+        if self.input_format == "pcmu":
+            pcm8k, self._ulaw_rate_state = audioop.ratecv(pcm16_mono_bytes, 2, 1, _INPUT_RATE, 8000, self._ulaw_rate_state)
+            self._send_audio(audioop.lin2ulaw(pcm8k, 2))
+            return
+        self._send_audio(pcm16_mono_bytes)
+
+    def _send_audio(self, pcm16_mono_bytes: bytes):
+        # Base64 never needs JSON escaping, so splice it into a pre-serialized envelope
+        payload = b"".join((_APPEND_PREFIX, base64.b64encode(pcm16_mono_bytes), _APPEND_SUFFIX))
+        if self._ws:
+            with self._send_lock:
+                self._ws.send(payload, opcode=websocket.ABNF.OPCODE_TEXT)
 
     def send_truncate(self, item_id: str, audio_end_ms: int):
         try:
@@ -199,6 +380,14 @@ class RealtimeClient:
                     self._ws_thread.join(timeout=1.0)
                 except Exception:
                     pass
+            if self._consumer_thread is not None:
+                self._in_q.put(None)
+                if self._consumer_thread is not threading.current_thread():
+                    try:
+                        self._consumer_thread.join(timeout=1.0)
+                    except Exception:
+                        pass
             self._ws = None
             self._ws_thread = None
+            self._consumer_thread = None
             self.log.info("Realtime disconnected")
\ No newline at end of file
@@ -8,27 +8,42 @@ from typing import Optional, TYPE_CHECKING
 import pjsua2 as pj
 
 from .call import Call
+from .scheduler import Scheduler
 from utils.logging import get_logger, bind, exception
 
 if TYPE_CHECKING:
     from processing.pipeline import CallProcessingPipeline
+    from realtime.pool import RealtimePool
 
 
 TMP_DIR = Path("/tmp/pjsua_recordings_v2")
 TMP_DIR.mkdir(parents=True, exist_ok=True)
 
+_SIP_USER_RE = re.compile(r"sip:([^@>]+)@")
+_NON_DIGIT_RE = re.compile(r"\D")
+_SIPVICIOUS_RE = re.compile("sipvicious", re.IGNORECASE)
+
 
 class Account(pj.Account):
     """SIP account that accepts incoming calls and creates Call handlers."""
 
-    def __init__(self, cmdq, pipeline: Optional["CallProcessingPipeline"] = None):
+    def __init__(
+        self,
+        cmdq,
+        pipeline: Optional["CallProcessingPipeline"] = None,
+        realtime_pool: Optional["RealtimePool"] = None,
+        scheduler: Optional[Scheduler] = None,
+    ):
         super().__init__()
         self.cmdq = cmdq
         self.sem_reg = threading.Semaphore(0)
-        # Track active Call objects to delete them before shutdown
-        self.calls: list[Call] = []
+        # Track active Call objects (by call id) to delete them before shutdown
+        self.calls: dict[str, Call] = {}
         self.log = get_logger("sip.account")
         self.pipeline = pipeline
+        self.realtime_pool = realtime_pool
+        # Shared timer thread for delayed per-call actions (greeting retries, segment overlap)
+        self.scheduler = scheduler or Scheduler()
 
     def onRegState(self, prm):
         self.log.info("Registration", reason=prm.reason)
@@ -38,23 +53,23 @@ class Account(pj.Account):
     def onIncomingCall(self, prm):
         call = Call(self, prm.callId)
         # Hold a strong reference so Python GC doesn't destroy it prematurely
-        self.calls.append(call)
+        self.calls[call._call_id] = call
         ci = call.getInfo()
         # Extract phone number
-        m = re.search(r"sip:([^@>]+)@", ci.remoteUri)
+        m = _SIP_USER_RE.search(ci.remoteUri)
         phone = m.group(1) if m else None
         call_id = getattr(ci, "callIdString", None) or str(id(call))
         clog = bind(self.log, call_id=call_id, remote=ci.remoteUri, phone=str(phone or "?"))
         clog.info("Incoming call")
 
-        if "sipvicious" in ci.remoteUri.lower():
+        if _SIPVICIOUS_RE.search(ci.remoteUri):
             clog.warning("Ignoring SIPVicious scan")
             return
 
         if not phone:
             clog.warning("Cannot parse phone — ignoring")
             return
-        digits_only = re.sub(r'\D', '', phone)
+        digits_only = _NON_DIGIT_RE.sub("", phone)
         if len(digits_only) != 11:
             clog.warning("Non-RU phone — ignoring", digits=digits_only)
             return
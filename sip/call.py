@@ -44,6 +44,8 @@ class Call(pj.Call):
         self._assistant_rate_state = None
         self._assistant_pending: deque[tuple[bytes, int]] = deque()
         self._summary_injected = False
+        self._live_transcript = None
+        self._active = False                # Mirrors CONFIRMED; maintained by onCallState
         try:
             ci = self.getInfo()
             cid = getattr(ci, "callIdString", None)
@@ -59,15 +61,13 @@ class Call(pj.Call):
             return False
 
     def _is_call_active(self) -> bool:
-        try:
-            ci = self.getInfo()
-            return ci.state == pj.PJSIP_INV_STATE_CONFIRMED
-        except Exception:
-            return False
+        # Checked by every playback command; a cached flag avoids building a CallInfo each time
+        return self._active
 
     # Called on SIP state change
     def onCallState(self, prm):
         ci = self.getInfo()
+        self._active = ci.state == pj.PJSIP_INV_STATE_CONFIRMED
         self.log.info("State change", state=ci.stateText, code=str(ci.lastStatusCode))
         if ci.stateText == "DISCONNECTED":
             self._stop_stream.set()
@@ -87,8 +87,8 @@ class Call(pj.Call):
                     except Exception:
                         pass
                     try:
-                        if hasattr(self.acc, 'calls') and self in self.acc.calls:
-                            self.acc.calls.remove(self)
+                        if hasattr(self.acc, 'calls'):
+                            self.acc.calls.pop(self._call_id, None)
                     except Exception:
                         pass
                 except Exception:
@@ -121,7 +121,7 @@ class Call(pj.Call):
         if not self._recording_path:
             return
         self._stop_stream.clear()
-        self._rt = RealtimeClient(
+        callbacks = dict(
             on_audio=self._on_bot_audio,
             on_text=self._on_bot_text,
             on_error=lambda e: self.log.error("Realtime error", error=str(e)),
@@ -130,6 +130,9 @@ class Call(pj.Call):
             on_speech_started=self._on_vad_speech_started,
             on_assistant_stream_start=self._on_assistant_stream_start,
         )
+        # A pooled session is already connected, so connect() in the stream loop is a no-op
+        pool = getattr(self.acc, "realtime_pool", None)
+        self._rt = pool.acquire(**callbacks) if pool else RealtimeClient(**callbacks)
         self._stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
         self._stream_thread.start()
 
@@ -144,8 +147,14 @@ class Call(pj.Call):
             self._stereo_sample_rate = getattr(self._tail, "sample_rate", None) or self._stereo_sample_rate
             self._start_conversation_recorder()
             
-            # Send audio frames as they appear (TailWavReader will pick ~20ms frames)
-            for chunk in self._tail.iter_chunks(stop_event=self._stop_stream):
+            # Read whole send batches so each pass records and sends ~REALTIME_SEND_BATCH_MS at once;
+            # without batching TailWavReader picks ~20ms frames
+            frame_bytes = None
+            batch_ms = getattr(self._rt, "send_batch_ms", 0)
+            if batch_ms:
+                tail = self._tail
+                frame_bytes = max(1, tail.sample_rate * tail.channels * tail.bytes_per_sample * batch_ms // 1000)
+            for chunk in self._tail.iter_chunks(stop_event=self._stop_stream, frame_bytes=frame_bytes):
                 self._record_caller_audio(chunk)
                 self._rt.send_audio_chunk(chunk)
 
@@ -244,11 +253,7 @@ class Call(pj.Call):
                 return
             if not self._is_call_active() or not self._has_valid_port(self._audio_media):
                 if retries_left > 0 and not self._stop_stream.is_set():
-                    def _retry():
-                        self._attempt_greeting_playback(retries_left - 1)
-                    timer = threading.Timer(0.05, _retry)
-                    timer.daemon = True
-                    timer.start()
+                    self.acc.scheduler.call_later(0.05, self._attempt_greeting_playback, retries_left - 1)
                 else:
                     self._greeting_done = True
                     self.log.warning("Greeting playback skipped; media not ready")
@@ -305,8 +310,12 @@ class Call(pj.Call):
         if not path:
             return
         sample_rate = self._stereo_sample_rate or 8000
+        pipeline = getattr(self.acc, "pipeline", None)
+        if pipeline and self._phone and not self._stop_stream.is_set():
+            self._live_transcript = pipeline.open_live_transcript(sample_rate, call_id=self._call_id)
+        on_frames = self._live_transcript.send if self._live_transcript else None
         try:
-            self._conversation_recorder = ConversationRecorder(path, sample_rate)
+            self._conversation_recorder = ConversationRecorder(path, sample_rate, on_frames=on_frames)
             self._assistant_rate_state = None
             self.log.info(
                 "Stereo conversation recording started",
@@ -365,6 +374,10 @@ class Call(pj.Call):
         self._conversation_recorder = None
         self._assistant_pending.clear()
         self._assistant_rate_state = None
+        if self._processing_dispatched and self._live_transcript:
+            # Opened after the pipeline was dispatched; nobody will finish it
+            self._live_transcript.close()
+            self._live_transcript = None
         if not recorder:
             return
         try:
@@ -378,7 +391,7 @@ class Call(pj.Call):
     def _on_bot_audio(self, audio_bytes: bytes, sample_rate: int):
         # Stream µ-law audio bytes chunk-by-chunk via jittered segment queue
         if not self._bot_streamer:
-            self._bot_streamer = BotAudioStreamer(self)
+            self._bot_streamer = _make_bot_streamer(self)
         try:
             self._bot_streamer.feed(audio_bytes, sample_rate or 8000)
         except Exception:
@@ -441,7 +454,7 @@ class Call(pj.Call):
         # A new assistant audio stream is starting; reset per-response metrics
         try:
             if not self._bot_streamer:
-                self._bot_streamer = BotAudioStreamer(self)
+                self._bot_streamer = _make_bot_streamer(self)
             self._bot_streamer.start_new_response(item_id)
             self.log.debug("Assistant stream start", item_id=str(item_id))
         except Exception:
@@ -476,11 +489,15 @@ class Call(pj.Call):
     def _dispatch_pipeline(self) -> None:
         if self._processing_dispatched:
             return
+        # The pipeline owns the live transcript once submitted; otherwise release it here
+        live = self._live_transcript
+        self._live_transcript = None
         pipeline = getattr(self.acc, "pipeline", None)
-        if not pipeline:
-            return
-        if not self._recording_path or not self._phone:
-            self.log.debug("Pipeline skipped due to missing phone or recording path")
+        if not pipeline or not self._recording_path or not self._phone:
+            if pipeline:
+                self.log.debug("Pipeline skipped due to missing phone or recording path")
+            if live:
+                live.close()
             return
         self._processing_dispatched = True
         pipeline_path = self._recording_path
@@ -488,9 +505,13 @@ class Call(pj.Call):
             stereo_path = self._stereo_recording_path
             if stereo_path and os.path.isfile(stereo_path):
                 pipeline_path = stereo_path
-            elif self._recording_path and os.path.isfile(self._recording_path):
-                pipeline_path = self._recording_path
-            pipeline.submit(self._phone, pipeline_path, call_id=self._call_id)
+            else:
+                if live:
+                    live.close()
+                    live = None
+                if self._recording_path and os.path.isfile(self._recording_path):
+                    pipeline_path = self._recording_path
+            pipeline.submit(self._phone, pipeline_path, call_id=self._call_id, live_transcript=live)
         except Exception:
             exception(
                 self.log,
@@ -500,6 +521,15 @@ class Call(pj.Call):
             )
 
 
+def _segment_dir() -> Optional[str]:
+    configured = os.getenv("BOT_SEGMENT_DIR")
+    if configured:
+        return configured
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
 class BotAudioStreamer:
     """Per-call jittered streamer that queues µ-law WAV segments for seamless playback.
 
@@ -519,6 +549,7 @@ class BotAudioStreamer:
         self.jitter_ms = int(os.getenv("BOT_JITTER_MS", "100"))                 # Jitter-like waiting
         self.overlap_ms = max(0, int(os.getenv("BOT_OVERLAP_MS", "10")))        # Start next segment slightly before current ends to avoid gaps
         self.segment_bytes = max(1, int(self.sample_rate * self.segment_ms / 1000))
+        self.segment_dir = _segment_dir()                                       # None keeps segments next to the recording
         
         # State
         self._buf = bytearray()
@@ -537,7 +568,10 @@ class BotAudioStreamer:
         self._preloaded_started: bool = False                    # Guard to avoid double start of preloaded
         self._lock = threading.Lock()
         self._counter = 0
+        self._closed = False
 
+    # feed() and on_done() come from the single realtime consumer thread; segment files are
+    # written between the two locked sections so main-thread commands never wait on disk I/O
     def feed(self, ulaw_bytes: bytes, sample_rate: int):
         if not ulaw_bytes:
             return
@@ -546,20 +580,34 @@ class BotAudioStreamer:
                 self.sample_rate = sample_rate
                 self.segment_bytes = max(1, int(self.sample_rate * self.segment_ms / 1000))
             self._buf.extend(ulaw_bytes)
-            self._flush_segments_locked()
+            segments = self._cut_segments_locked()
+        written = self._write_segments(segments)
+        with self._lock:
+            self._enqueue_locked(written)
             self._maybe_start_locked()
 
     def on_done(self):
+        segments = []
         with self._lock:
             # Flush remaining as a final small segment
             if self._buf:
-                self._emit_segment_locked(bytes(self._buf), int(len(self._buf) * 1000 / self.sample_rate))
+                segments.append(self._segment_locked(bytes(self._buf), int(len(self._buf) * 1000 / self.sample_rate)))
                 self._buf.clear()
+        written = self._write_segments(segments)
+        with self._lock:
+            self._enqueue_locked(written)
             self._end_of_response = True
             self._maybe_start_locked()      # If playback is ongoing and player is idle, try to start next
 
     def close(self):
         with self._lock:
+            self._closed = True
+            # Segments that never reached a player would otherwise be left behind
+            for path, _ in self._queue:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
             self._queue.clear()
             self._queued_ms = 0
             self._buf.clear()
@@ -570,42 +618,55 @@ class BotAudioStreamer:
             if self._player:
                 p = self._player
                 self._player = None
-                def _stop():
-                    try:
-                        if self.call._is_call_active() and self.call._has_valid_port(p) and self.call._has_valid_port(self.call._audio_media):
-                            try:
-                                p.stopTransmit(self.call._audio_media)
-                            except Exception:
-                                pass
-                    finally:
-                        try:
-                            p.delete()
-                        except Exception:
-                            pass
-                self.cmdq.put(_stop)
+                self.cmdq.put(self._release_player, p)
 
     # Internals
-    def _flush_segments_locked(self):
+    def _cut_segments_locked(self) -> list[tuple[str, bytes, int, int]]:
         # Emit fixed-size segments for smoother playback
-        while len(self._buf) >= self.segment_bytes:
-            chunk = self._buf[:self.segment_bytes]
-            del self._buf[:self.segment_bytes]
-            self._emit_segment_locked(bytes(chunk), self.segment_ms)
-
-    def _emit_segment_locked(self, ulaw_chunk: bytes, duration_ms: int):
-        from audio.g711_wav import write_mulaw_wav
-
-        # Use same directory as recording to stay on same filesystem
+        seg = self.segment_bytes
+        ready = len(self._buf) - len(self._buf) % seg
+        if not ready:
+            return []
+        # Copy each segment once out of a view, then drop the consumed prefix in a single memmove
+        with memoryview(self._buf) as view:
+            segments = [self._segment_locked(bytes(view[off:off + seg]), self.segment_ms) for off in range(0, ready, seg)]
+        del self._buf[:ready]
+        return segments
+
+    def _segment_locked(self, ulaw_chunk: bytes, duration_ms: int) -> tuple[str, bytes, int, int]:
+        # Segments live on tmpfs when available, otherwise next to the recording
         base = self.call._recording_path or f"/tmp/pjsua_recordings_v2/call_{uuid.uuid4().hex}.wav"
         path = base.replace('.wav', f"_stream_{self._counter}.wav")
+        if self.segment_dir:
+            path = os.path.join(self.segment_dir, os.path.basename(path))
         self._counter += 1
-        try:
-            write_mulaw_wav(path, ulaw_chunk, self.sample_rate)
+        return path, ulaw_chunk, duration_ms, self.sample_rate
+
+    def _write_segments(self, segments: list[tuple[str, bytes, int, int]]) -> list[tuple[str, int]]:
+        from audio.g711_wav import write_mulaw_wav
+
+        written: list[tuple[str, int]] = []
+        for path, ulaw_chunk, duration_ms, sample_rate in segments:
+            try:
+                write_mulaw_wav(path, ulaw_chunk, sample_rate)
+                written.append((path, duration_ms))
+            except Exception:
+                exception(self.log, "Failed to write segment", file=path)
+        return written
+
+    def _enqueue_locked(self, written: list[tuple[str, int]]):
+        if self._closed:
+            # close() ran while these were being written
+            for path, _ in written:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+        for path, duration_ms in written:
             self._queue.append((path, duration_ms))
             self._queued_ms += duration_ms
             self._received_ms_total += duration_ms
-        except Exception:
-            exception(self.log, "Failed to write segment", file=path)
 
     def _maybe_start_locked(self):
         # Start playback once jitter buffer is filled, or continue chaining
@@ -628,86 +689,82 @@ class BotAudioStreamer:
 
         path, dur = self._queue.pop(0)
         self._queued_ms = max(0, self._queued_ms - dur)
+        self.cmdq.put(self._play_next, path, dur)
 
-        def _play_next():
-            # Validate ports
-            if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
-                return
+    # Main-thread commands; queued as bound methods plus arguments so no closure is built per segment
+    def _play_next(self, path: str, dur: int):
+        # Validate ports
+        if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
+            return
 
+        try:
+            p = self._create_player_for(path)
+            if self.call._is_call_active() and self.call._has_valid_port(self.call._audio_media):
+                p.startTransmit(self.call._audio_media)
+            with self._lock:
+                self._player = p
+                self._current_end_ts = time.monotonic() + max(0.0, float(dur) / 1000.0)     # Compute expected end timestamp for overlap scheduling
+                self._current_seg_dur_ms = int(dur)
+                self._current_seg_start_ts = time.monotonic()
+
+            # Try to preload the next segment (if any) to remove file open latency
+            self.log.info("Segment playback", file=path, ms=str(dur))
+            self._try_preload_next()
+            self._schedule_overlap_start(dur)
+        except Exception:
+            exception(self.log, "Segment play failed", file=path)
+
+    def _preload(self, next_path: str):
+        if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
+            return
+        try:
+            np = self._create_player_for(next_path)
+            with self._lock:
+                self._preloaded = np
+                self._preloaded_started = False
+            self.log.debug("Preloaded next segment", file=next_path)
+        except Exception:
+            exception(self.log, "Preload failed", file=next_path)
+
+    def _advance(self, player: "_SegmentPlayer"):
+        try:
+            self._release_player(player)
+        finally:
             try:
-                p = self._create_player_for(path)
-                if self.call._is_call_active() and self.call._has_valid_port(self.call._audio_media):
-                    p.startTransmit(self.call._audio_media)
-                with self._lock:
-                    self._player = p
-                    self._current_end_ts = time.monotonic() + max(0.0, float(dur) / 1000.0)     # Compute expected end timestamp for overlap scheduling
-                    self._current_seg_dur_ms = int(dur)
-                    self._current_seg_start_ts = time.monotonic()
-                
-                # Try to preload the next segment (if any) to remove file open latency
-                self.log.info("Segment playback", file=path, ms=str(dur))
-                self._try_preload_next()
-                self._schedule_overlap_start(dur)
+                os.remove(player.seg_path)
             except Exception:
-                exception(self.log, "Segment play failed", file=path)
+                pass
+        with self._lock:
+            was_active = (self._player is player)
+            if was_active:
+                self._player = None
+            if was_active and self._queue:
+                self._start_next_locked()
 
-        self.cmdq.put(_play_next)
+    def _release_player(self, p: pj.AudioMediaPlayer):
+        try:
+            if self.call._is_call_active() and self.call._has_valid_port(p) and self.call._has_valid_port(self.call._audio_media):
+                try:
+                    p.stopTransmit(self.call._audio_media)
+                except Exception:
+                    pass
+        finally:
+            try:
+                p.delete()
+            except Exception:
+                pass
 
     def _try_preload_next(self):
-        # Prepare next player in advance without starting it
+        # Prepare next player in advance without starting it; callers already run on the
+        # main thread, so do it in the same command instead of queueing another one
         with self._lock:
             if self._preloaded or not self._queue:
                 return
             next_path, _ = self._queue[0]
-
-        def _prep():
-            if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
-                return
-            try:
-                np = self._create_player_for(next_path)
-                with self._lock:
-                    self._preloaded = np
-                    self._preloaded_started = False
-                self.log.debug("Preloaded next segment", file=next_path)
-            except Exception:
-                exception(self.log, "Preload failed", file=next_path)
-        self.cmdq.put(_prep)
+        self._preload(next_path)
 
     def _create_player_for(self, path: str) -> pj.AudioMediaPlayer:
-        # Define a subclass to hook EOF for cleanup and conditional chaining
-        streamer = self
-        call = self.call
-
-        class _Player(pj.AudioMediaPlayer):
-            def __init__(self_inner):
-                super().__init__()
-                self_inner._seg_path = path
-            def onEof2(self_inner):
-                def _advance():
-                    try:
-                        if call._is_call_active() and call._has_valid_port(self_inner) and call._has_valid_port(call._audio_media):
-                            try:
-                                self_inner.stopTransmit(call._audio_media)
-                            except Exception:
-                                pass
-                    finally:
-                        try:
-                            self_inner.delete()
-                        except Exception:
-                            pass
-                        try:
-                            os.remove(getattr(self_inner, '_seg_path', path))
-                        except Exception:
-                            pass
-                    with streamer._lock:
-                        was_active = (streamer._player is self_inner)
-                        if was_active:
-                            streamer._player = None
-                        if was_active and streamer._queue:
-                            streamer._start_next_locked()
-                streamer.cmdq.put(_advance)
-
-        p = _Player()
+        p = _SegmentPlayer(self, path)
         p.createPlayer(path, pj.PJMEDIA_FILE_NO_LOOP)
         return p
 
@@ -729,56 +786,53 @@ class BotAudioStreamer:
                 else:
                     pre = None  # Nothing to start or already enqueued
             if pre and cur and still_time > -0.25:      # within reasonable window
-                def _start_preloaded():
-                    if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
-                        # Reset guard to allow retry if conditions change
-                        with self._lock:
-                            self._preloaded_started = False
-                        return
-                    try:
-                        pre.startTransmit(self.call._audio_media)
-                        next_dur_local = None
-                        with self._lock:
-                            # Transition: new becomes the active player
-                            self._player = pre
-                            self._preloaded = None
-                            self._preloaded_started = False
-
-                            # Remove the just-started path from queue since it's now playing
-                            if self._queue:
-                                # Pop the first queued item as it's now started
-                                path_started, next_dur_local = self._queue.pop(0)
-                                self._queued_ms = max(0, self._queued_ms - next_dur_local)
-
-                                # Update expected end based on the new segment
-                                self._current_end_ts = time.monotonic() + max(0.0, float(next_dur_local) / 1000.0)
-                                self._current_seg_dur_ms = int(next_dur_local)
-                                self._current_seg_start_ts = time.monotonic()
-                        
-                        self._try_preload_next()    # After starting, immediately try to preload the subsequent one
-                        
-                        # And schedule overlap again for the now-active segment
-                        if next_dur_local is not None:
-                            self._schedule_overlap_start(next_dur_local)
-                        self.log.debug("Overlap start", ms=str(self.overlap_ms))
-                    except Exception:
-                        exception(self.log, "Overlap start failed")
-                        with self._lock:
-                            # Allow retry on failure
-                            self._preloaded_started = False
-                self.cmdq.put(_start_preloaded)
+                self.cmdq.put(self._start_preloaded, pre)
             else:
                 # If not ready yet and current hasn't finished, retry shortly
                 with self._lock:
                     retry = (self._player is not None) and (self._current_end_ts - time.monotonic() > 0.01)
                 if retry:
-                    t = threading.Timer(0.01, _tick)
-                    t.daemon = True
-                    t.start()
+                    self.call.acc.scheduler.call_later(0.01, _tick)
 
-        t = threading.Timer(delay, _tick)
-        t.daemon = True
-        t.start()
+        self.call.acc.scheduler.call_later(delay, _tick)
+
+    def _start_preloaded(self, pre: pj.AudioMediaPlayer):
+        if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
+            # Reset guard to allow retry if conditions change
+            with self._lock:
+                self._preloaded_started = False
+            return
+        try:
+            pre.startTransmit(self.call._audio_media)
+            next_dur_local = None
+            with self._lock:
+                # Transition: new becomes the active player
+                self._player = pre
+                self._preloaded = None
+                self._preloaded_started = False
+
+                # Remove the just-started path from queue since it's now playing
+                if self._queue:
+                    # Pop the first queued item as it's now started
+                    path_started, next_dur_local = self._queue.pop(0)
+                    self._queued_ms = max(0, self._queued_ms - next_dur_local)
+
+                    # Update expected end based on the new segment
+                    self._current_end_ts = time.monotonic() + max(0.0, float(next_dur_local) / 1000.0)
+                    self._current_seg_dur_ms = int(next_dur_local)
+                    self._current_seg_start_ts = time.monotonic()
+
+            self._try_preload_next()    # After starting, immediately try to preload the subsequent one
+
+            # And schedule overlap again for the now-active segment
+            if next_dur_local is not None:
+                self._schedule_overlap_start(next_dur_local)
+            self.log.debug("Overlap start", ms=str(self.overlap_ms))
+        except Exception:
+            exception(self.log, "Overlap start failed")
+            with self._lock:
+                # Allow retry on failure
+                self._preloaded_started = False
 
     # Playback progress and interruption helpers
     def _current_remaining_ms_locked(self) -> int:
@@ -812,30 +866,10 @@ class BotAudioStreamer:
             self._preloaded = None
             self._preloaded_started = False
 
-            def _stop_active():
-                try:
-                    if p and self.call._is_call_active() and self.call._has_valid_port(p) and self.call._has_valid_port(self.call._audio_media):
-                        try:
-                            p.stopTransmit(self.call._audio_media)
-                        except Exception:
-                            pass
-                finally:
-                    try:
-                        if p:
-                            p.delete()
-                    except Exception:
-                        pass
-
-            def _delete_preloaded():
-                try:
-                    if pre:
-                        pre.delete()
-                except Exception:
-                    pass
-
-            self.cmdq.put(_stop_active)
+            if p:
+                self.cmdq.put(self._release_player, p)
             if pre:
-                self.cmdq.put(_delete_preloaded)
+                self.cmdq.put(_delete_player, pre)
 
             # Clear pending content
             self._queue.clear()
@@ -867,3 +901,263 @@ class BotAudioStreamer:
         with self._lock:
             return bool(self._player)
 
+
+class _PcmRing:
+    """Power-of-two byte ring; head/tail are running totals wrapped with a mask, so it grows but never compacts."""
+
+    def __init__(self, capacity: int = 1 << 18):
+        size = 1 << max(0, capacity - 1).bit_length()
+        self._buf = bytearray(size)
+        self._mask = size - 1
+        self._head = 0      # Total bytes written
+        self._tail = 0      # Total bytes read
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def write(self, data: bytes) -> None:
+        n = len(data)
+        if len(self) + n > len(self._buf):
+            self._grow(len(self) + n)
+        size = len(self._buf)
+        start = self._head & self._mask
+        first = min(n, size - start)
+        self._buf[start:start + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        self._head += n
+
+    def read(self, n: int) -> bytes:
+        n = min(n, len(self))
+        size = len(self._buf)
+        start = self._tail & self._mask
+        end = start + n
+        with memoryview(self._buf) as view:
+            if end <= size:
+                out = bytes(view[start:end])
+            else:
+                out = b"".join((view[start:], view[:end - size]))
+        self._tail += n
+        return out
+
+    def clear(self) -> None:
+        self._tail = self._head
+
+    def _grow(self, need: int) -> None:
+        pending = self.read(len(self))
+        size = 1 << (need - 1).bit_length()
+        self._buf = bytearray(size)
+        self._mask = size - 1
+        self._head = self._tail = 0
+        self.write(pending)
+
+
+class PortAudioStreamer:
+    """Per-call streamer that plays µ-law audio through one custom media port.
+
+    - Decodes incoming PCMU to PCM16 into a preallocated ring; no files and no players.
+    - The conference bridge pulls 20 ms frames from the port via onFrameRequested.
+    - Output starts once the jitter buffer is filled or the response is complete.
+    """
+
+    def __init__(self, call: Call):
+        self.call = call
+        self.cmdq = call.acc.cmdq
+        self.log = bind(get_logger("sip.stream"), call_id=call._call_id)
+
+        self.sample_rate = 8000
+        self.jitter_ms = int(os.getenv("BOT_JITTER_MS", "100"))
+        self.frame_bytes = self.sample_rate * 2 // 50      # 20 ms of PCM16
+
+        self._pcm = _PcmRing()
+        self._started = False
+        self._end_of_response = False
+        self._played_bytes = 0                  # PCM bytes handed to the bridge for the current response
+        self._response_item_id: Optional[str] = None
+        self._port: Optional[_PcmPlaybackPort] = None
+        self._attach_requested = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def feed(self, ulaw_bytes: bytes, sample_rate: int):
+        if not ulaw_bytes:
+            return
+        pcm = audioop.ulaw2lin(ulaw_bytes, 2)
+        with self._lock:
+            if self._closed:
+                return
+            self._pcm.write(pcm)
+            self._maybe_start_locked()
+            attach = not self._attach_requested
+            self._attach_requested = True
+        if attach:
+            self.cmdq.put(self._attach)
+
+    def on_done(self):
+        with self._lock:
+            self._end_of_response = True
+            self._maybe_start_locked()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._pcm.clear()
+            self._started = False
+            attached = self._attach_requested
+        # The port is only ever created and released on the main thread; an _attach still
+        # queued ahead of this sees _closed and disposes of its own port
+        if attached:
+            self.cmdq.put(self._detach)
+
+    def next_frame(self) -> Optional[bytes]:
+        # Called from the pjmedia clock thread
+        with self._lock:
+            if not self._started or not self._pcm:
+                return None
+            frame = self._pcm.read(self.frame_bytes)
+            n = len(frame)
+            self._played_bytes += n
+            if not self._pcm and self._end_of_response:
+                self._started = False
+                self._end_of_response = False
+        if n < self.frame_bytes:
+            frame += bytes(self.frame_bytes - n)
+        return frame
+
+    def _maybe_start_locked(self):
+        if not self._started and self._pcm:
+            if self._end_of_response or len(self._pcm) * 1000 >= self.jitter_ms * self.sample_rate * 2:
+                self._started = True
+
+    # Main-thread commands
+    def _attach(self):
+        if not self.call._is_call_active() or not self.call._has_valid_port(self.call._audio_media):
+            with self._lock:
+                self._attach_requested = False      # Retry on the next feed
+            return
+        try:
+            port = _PcmPlaybackPort(self)
+            port.createPort(f"bot-{self.call._call_id}", _pcm_format(self.sample_rate))
+            port.startTransmit(self.call._audio_media)
+        except Exception:
+            exception(self.log, "Failed to create playback port")
+            return
+        with self._lock:
+            if not self._closed:
+                self._port = port
+                port = None
+        if port is not None:
+            self._release_port(port)
+        else:
+            self.log.info("Playback port attached")
+
+    def _detach(self):
+        with self._lock:
+            port = self._port
+            self._port = None
+        if port is not None:
+            self._release_port(port)
+
+    def _release_port(self, port: "_PcmPlaybackPort"):
+        try:
+            if self.call._is_call_active() and self.call._has_valid_port(port) and self.call._has_valid_port(self.call._audio_media):
+                port.stopTransmit(self.call._audio_media)
+        except Exception:
+            pass
+        finally:
+            # Break the port <-> streamer cycle and delete here, so the conference slot is
+            # freed on the pjsua thread rather than whenever the cycle collector runs
+            port.streamer = None
+            _delete_player(port)
+
+    # Playback progress and interruption helpers
+    def get_played_ms(self) -> int:
+        with self._lock:
+            return self._played_bytes * 1000 // (self.sample_rate * 2)
+
+    def interrupt_and_get_progress_ms(self) -> int:
+        with self._lock:
+            played = self._played_bytes * 1000 // (self.sample_rate * 2)
+            self._pcm.clear()
+            self._started = False
+            self._end_of_response = False
+            return played
+
+    def start_new_response(self, item_id: str):
+        with self._lock:
+            self._response_item_id = item_id
+            self._played_bytes = 0
+            self._pcm.clear()
+            self._started = False
+            self._end_of_response = False
+
+    def current_item_id(self) -> Optional[str]:
+        with self._lock:
+            return self._response_item_id
+
+    def is_playing(self) -> bool:
+        with self._lock:
+            return self._started and bool(self._pcm)
+
+
+_FRAME_TYPE_NONE = getattr(pj, "PJMEDIA_FRAME_TYPE_NONE", 0)
+_FRAME_TYPE_AUDIO = getattr(pj, "PJMEDIA_FRAME_TYPE_AUDIO", 1)
+# FOURCC 'L16 ', the conference bridge's native format
+_FORMAT_PCM = getattr(pj, "PJMEDIA_FORMAT_PCM", 0x2036314C)
+
+
+def _pcm_format(sample_rate: int) -> "pj.MediaFormatAudio":
+    fmt = pj.MediaFormatAudio()
+    fmt.init(_FORMAT_PCM, sample_rate, 1, 20000, 16)
+    return fmt
+
+
+class _PcmPlaybackPort(pj.AudioMediaPort):
+    """Conference port that pulls decoded bot audio from a PortAudioStreamer."""
+
+    def __init__(self, streamer: PortAudioStreamer):
+        super().__init__()
+        self.streamer = streamer
+        # Reused for every frame; next_frame() always returns exactly frame_bytes
+        self._buf = pj.ByteVector(bytes(streamer.frame_bytes))
+
+    def onFrameRequested(self, frame):
+        streamer = self.streamer
+        data = streamer.next_frame() if streamer is not None else None
+        if data is None:
+            frame.type = _FRAME_TYPE_NONE
+            frame.size = 0
+            return
+        frame.type = _FRAME_TYPE_AUDIO
+        # Same-size slice assignment copies into the existing vector instead of
+        # allocating a new one; the frame then takes it by value
+        buf = self._buf
+        buf[:] = data
+        frame.buf = buf
+        frame.size = len(data)
+
+
+def _make_bot_streamer(call: Call):
+    # BOT_PLAYBACK=port feeds a single media port instead of per-segment WAV players
+    if os.getenv("BOT_PLAYBACK", "segments").lower() == "port" and hasattr(pj, "AudioMediaPort"):
+        return PortAudioStreamer(call)
+    return BotAudioStreamer(call)
+
+
+def _delete_player(p: pj.AudioMediaPlayer) -> None:
+    try:
+        p.delete()
+    except Exception:
+        pass
+
+
+class _SegmentPlayer(pj.AudioMediaPlayer):
+    """Player for one queued segment; EOF hands it back to the streamer on the main thread."""
+
+    def __init__(self, streamer: BotAudioStreamer, path: str):
+        super().__init__()
+        self.streamer = streamer
+        self.seg_path = path
+
+    def onEof2(self):
+        self.streamer.cmdq.put(self.streamer._advance, self)
@@ -1,4 +1,4 @@
-import queue
+from collections import deque
 from typing import Callable, Any, Dict
 from utils.logging import get_logger
 
@@ -10,20 +10,23 @@ class CommandQueue:
     """
 
     def __init__(self):
-        self._q: "queue.Queue[tuple[Callable, tuple, Dict]]" = queue.Queue()
+        # deque.append/popleft are atomic, so producers never take a lock and the
+        # polling main thread needs no condition variable to wake it
+        self._q: "deque[tuple[Callable, tuple, Dict]]" = deque()
         self._log = get_logger("sip.cmdq")
 
     def put(self, func: Callable, *args: Any, **kwargs: Any) -> None:
-        self._q.put((func, args, kwargs))
-        self._log.debug("Enqueued", size=str(self._q.qsize()))      # debug-level
+        self._q.append((func, args, kwargs))
+        self._log.debug("Enqueued", size=str(len(self._q)))      # debug-level
+
+    def has_pending(self) -> bool:
+        return bool(self._q)
 
     def execute_pending(self) -> None:
+        # Anything left behind by a raising command stays queued for the next cycle
         while True:
             try:
-                func, args, kwargs = self._q.get_nowait()
-            except queue.Empty:
+                func, args, kwargs = self._q.popleft()
+            except IndexError:
                 break
-            try:
-                func(*args, **kwargs)
-            finally:
-                self._q.task_done()
\ No newline at end of file
+            func(*args, **kwargs)
@@ -0,0 +1,64 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from utils.logging import get_logger, exception
+
+
+class Scheduler:
+    """One background thread that runs callbacks at monotonic deadlines.
+
+    Replaces a threading.Timer (and so a new thread) per delayed action. Callbacks run
+    on the scheduler thread and must stay short; PJSUA2 calls still go through the cmdq.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Callable, tuple]] = []
+        self._seq = itertools.count()       # Tie-breaker so callables are never compared
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._log = get_logger("sip.scheduler")
+
+    def call_later(self, delay: float, func: Callable, *args: Any) -> None:
+        self.call_at(time.monotonic() + max(0.0, delay), func, *args)
+
+    def call_at(self, deadline: float, func: Callable, *args: Any) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            heapq.heappush(self._heap, (deadline, next(self._seq), func, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sip-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            _, _, func, args = heapq.heappop(self._heap)
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            try:
+                func(*args)
+            except Exception:
+                exception(self._log, "Scheduled callback failed")
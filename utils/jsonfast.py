@@ -0,0 +1,32 @@
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson  # type: ignore
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """Decode JSON using orjson when available, stdlib json otherwise."""
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, *, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encode JSON as UTF-8 bytes (non-ASCII kept as-is), optionally 2-space indented.
+
+    ``default`` is called for objects that are not natively serializable, as in ``json.dumps``.
+    """
+    if _HAS_ORJSON:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS if indent else orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")